@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from djangoql.admin import DjangoQLSearchMixin
 from rest_framework_simplejwt import token_blacklist
 
-from .models import User
+from .models import Reputation, User
 
 
 class UserAdmin(DjangoQLSearchMixin, BaseUserAdmin):
@@ -84,6 +84,23 @@ class UserAdmin(DjangoQLSearchMixin, BaseUserAdmin):
     )
 
 
+class ReputationAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "score",
+        "upvotes_received",
+        "downvotes_received",
+        "accepted_implementations",
+        "validated_implementations",
+        "comments",
+    )
+    list_display_links = list_display
+    raw_id_fields = ("user",)
+    readonly_fields = ("updated_at",)
+    search_fields = ("user__username",)
+    ordering = ("-score",)
+
+
 class OutstandingTokenAdmin(token_blacklist.admin.OutstandingTokenAdmin):
     # https://github.com/jazzband/djangorestframework-simplejwt/issues/266#issuecomment-820745103
     def has_delete_permission(self, *args, **kwargs):
@@ -93,3 +110,4 @@ class OutstandingTokenAdmin(token_blacklist.admin.OutstandingTokenAdmin):
 admin.site.unregister(token_blacklist.models.OutstandingToken)
 admin.site.register(token_blacklist.models.OutstandingToken, OutstandingTokenAdmin)
 admin.site.register(User, UserAdmin)
+admin.site.register(Reputation, ReputationAdmin)
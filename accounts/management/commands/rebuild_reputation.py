@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Reputation
+
+
+class Command(BaseCommand):
+    help = "Recompute the reputation of every user from scratch."
+
+    def handle(self, *args, **options):
+        users = Reputation.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Reputation rebuilt for {users} users"))
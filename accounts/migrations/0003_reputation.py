@@ -0,0 +1,43 @@
+# Generated by Django 4.0.3 on 2026-10-18 13:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Reputation",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="reputation",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("upvotes_received", models.IntegerField(default=0)),
+                ("downvotes_received", models.IntegerField(default=0)),
+                ("accepted_implementations", models.IntegerField(default=0)),
+                ("validated_implementations", models.IntegerField(default=0)),
+                ("comments", models.IntegerField(default=0)),
+                ("score", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="reputation",
+            index=models.Index(
+                fields=["-score", "user"], name="reputation_leaderboard_idx"
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, F
 
 from .validators import UsernameValidator, avatar_validator
 
@@ -57,3 +59,181 @@ class User(AbstractUser):
         if not self.avatar:
             self.avatar = f"https://avatars.dicebear.com/api/identicon/{self.email}.svg"
         super().save(*args, **kwargs)
+
+
+# points per unit of each reputation counter
+REPUTATION_WEIGHTS = {
+    "upvotes_received": 10,
+    "downvotes_received": -2,
+    "accepted_implementations": 25,
+    "validated_implementations": 15,
+    "comments": 1,
+}
+
+ADJUST_REPUTATION_SQL = """
+INSERT INTO {table} AS reputation (user_id, {columns}, score, updated_at)
+VALUES (%(user)s, {values}, %(score)s, now())
+ON CONFLICT (user_id) DO UPDATE SET
+    {updates},
+    score = reputation.score + EXCLUDED.score,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+class ReputationManager(models.Manager):
+    def adjust(self, user_id: int, **deltas: int) -> None:
+        """
+        Add the given deltas to the reputation counters and score of a user,
+        creating their row if needed, in a single statement.
+        """
+        if user_id is None or not any(deltas.values()):
+            return
+        deltas = {field: deltas.get(field, 0) for field in REPUTATION_WEIGHTS}
+        quote = connection.ops.quote_name
+        columns = [quote(field) for field in deltas]
+        sql = ADJUST_REPUTATION_SQL.format(
+            table=quote(self.model._meta.db_table),
+            columns=", ".join(columns),
+            values=", ".join(f"%({field})s" for field in deltas),
+            updates=",\n    ".join(
+                f"{column} = reputation.{column} + EXCLUDED.{column}"
+                for column in columns
+            ),
+        )
+        score = sum(
+            REPUTATION_WEIGHTS[field] * delta for field, delta in deltas.items()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"user": user_id, "score": score, **deltas})
+
+    def retract(self, post) -> None:
+        """
+        Take back what `post`, an idea, implementation or discussion, and the
+        comments on it contributed to reputation. Call it in the transaction
+        deleting the post: the post is locked first, so its counters are read
+        after any vote in progress.
+        """
+        flags = [
+            (field, flag)
+            for field, flag in (
+                ("accepted_implementations", "is_accepted"),
+                ("validated_implementations", "is_validated"),
+            )
+            if hasattr(post, flag)
+        ]
+        row = (
+            type(post)
+            .objects.select_for_update()
+            .filter(pk=post.pk)
+            .values("owner", "upvote_count", "downvote_count", *(f for _, f in flags))
+            .first()
+        )
+        if row is None:
+            return
+        self.adjust(
+            row["owner"],
+            upvotes_received=-row["upvote_count"],
+            downvotes_received=-row["downvote_count"],
+            **{field: -int(row[flag]) for field, flag in flags},
+        )
+        comments = getattr(post, "comments", None)
+        if comments is None:
+            return
+        for owner, count in (
+            comments.order_by()
+            .values("owner")
+            .annotate(count=Count("*"))
+            .values_list("owner", "count")
+        ):
+            self.adjust(owner, comments=-count)
+
+    def rebuild(self) -> int:
+        """
+        Recompute the reputation of every user from the source tables.
+        Returns the number of users.
+        """
+        from discussions.models import Discussion, DiscussionComment
+        from flaam_api.utils.counters import count_subquery, sum_subquery
+        from ideas.models import Idea
+        from implementations.models import Implementation, ImplementationComment
+
+        posts = (Idea, Implementation, Discussion)
+        implementations = Implementation.objects.all()
+        sources = {
+            "upvotes_received": [
+                sum_subquery(model.objects.all(), "owner", "upvote_count")
+                for model in posts
+            ],
+            "downvotes_received": [
+                sum_subquery(model.objects.all(), "owner", "downvote_count")
+                for model in posts
+            ],
+            "accepted_implementations": [
+                count_subquery(implementations.filter(is_accepted=True), "owner")
+            ],
+            "validated_implementations": [
+                count_subquery(implementations.filter(is_validated=True), "owner")
+            ],
+            "comments": [
+                count_subquery(ImplementationComment.objects.all(), "owner"),
+                count_subquery(DiscussionComment.objects.all(), "owner"),
+            ],
+        }
+
+        quote = connection.ops.quote_name
+        user_table = quote(
+            self.model._meta.get_field("user").related_model._meta.db_table
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {quote(self.model._meta.db_table)} AS reputation
+                    (user_id, {", ".join(quote(field) for field in REPUTATION_WEIGHTS)},
+                    score, updated_at)
+                SELECT id, {", ".join("0" for _ in REPUTATION_WEIGHTS)}, 0, now()
+                FROM {user_table}
+                ON CONFLICT DO NOTHING
+                """
+            )
+            # the primary key is the user id, so the subqueries match on it
+            users = self.update(
+                **{field: sum(expressions) for field, expressions in sources.items()}
+            )
+            self.update(
+                score=sum(
+                    F(field) * weight for field, weight in REPUTATION_WEIGHTS.items()
+                )
+            )
+        return users
+
+
+class Reputation(models.Model):
+    """
+    Materialized per-user contribution counters and the score derived from
+    them with `REPUTATION_WEIGHTS`. Kept up to date incrementally, and
+    recomputed from scratch by the `rebuild_reputation` command.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="reputation",
+    )
+    upvotes_received = models.IntegerField(default=0)
+    downvotes_received = models.IntegerField(default=0)
+    accepted_implementations = models.IntegerField(default=0)
+    validated_implementations = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ReputationManager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=("-score", "user"), name="reputation_leaderboard_idx"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.user_id} - {self.score}"
@@ -2,12 +2,15 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from flaam_api.utils.query_metrics import MeasuredSerializerMixin
+
+from .models import Reputation
 from .validators import PasswordValidator
 
 UserModel = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """User serializer"""
 
     class Meta:
@@ -61,14 +64,19 @@ class UserSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class PublicUserSerializer(serializers.ModelSerializer):
+class PublicUserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """For public user profile"""
 
     email = serializers.SerializerMethodField()
+    reputation = serializers.SerializerMethodField()
 
     def get_email(self, instance):
         return instance.email if instance.show_email else None
 
+    def get_reputation(self, instance) -> int:
+        reputation = getattr(instance, "reputation", None)
+        return reputation.score if reputation else 0
+
     class Meta:
         model = UserModel
         fields = (
@@ -80,6 +88,7 @@ class PublicUserSerializer(serializers.ModelSerializer):
             "status",
             "description",
             "avatar",
+            "reputation",
             "following",
             "followers",
             "favourite_tags",
@@ -97,6 +106,29 @@ class PublicUserSerializer(serializers.ModelSerializer):
         raise NotImplementedError
 
 
+class LeaderboardSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
+    """Reputation of a user, for the leaderboard"""
+
+    id = serializers.IntegerField(source="user.id")
+    username = serializers.CharField(source="user.username")
+    avatar = serializers.CharField(source="user.avatar")
+
+    class Meta:
+        model = Reputation
+        fields = (
+            "id",
+            "username",
+            "avatar",
+            "score",
+            "upvotes_received",
+            "downvotes_received",
+            "accepted_implementations",
+            "validated_implementations",
+            "comments",
+        )
+        read_only_fields = fields
+
+
 class PasswordResetTokenSerializer(serializers.Serializer):
     """Serializer to get reset password token"""
 
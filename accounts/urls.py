@@ -1,9 +1,12 @@
 from django.urls import path
 
+from flaam_api.utils.async_views import as_async_view
+
 from .views import (
     DecoratedTokenObtainPairView,
     DecoratedTokenRefreshView,
     DecoratedTokenVerifyView,
+    LeaderboardView,
     PublicUserProfileView,
     ResetPasswordTokenView,
     ResetPasswordView,
@@ -20,11 +23,12 @@ urlpatterns = [
     # Users
     path("users", UserRegisterView.as_view(), name="signup"),
     path("user/exists", UserExistsView.as_view(), name="user_exists"),
+    path("users/leaderboard", as_async_view(LeaderboardView), name="leaderboard"),
     path("user/profile", UserProfileView.as_view(), name="user_profile"),
-    path("user/<int:pk>", PublicUserProfileView.as_view(), name="user_public_id"),
+    path("user/<int:pk>", as_async_view(PublicUserProfileView), name="user_public_id"),
     path(
         "user/<str:username>",
-        PublicUserProfileView.as_view(),
+        as_async_view(PublicUserProfileView),
         name="user_public_username",
     ),
     # password
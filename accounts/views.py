@@ -10,6 +10,7 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.exceptions import APIException, ParseError
+from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -25,8 +26,11 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
-from .models import User
+from flaam_api.utils.mixins import SparseFieldsetMixin
+
+from .models import Reputation, User
 from .serializers import (
+    LeaderboardSerializer,
     PasswordResetSerializer,
     PasswordResetTokenSerializer,
     PublicUserSerializer,
@@ -186,11 +190,33 @@ class PublicUserProfileView(APIView):
     )
     def get(self, request: Request, **kwargs) -> Response:
         """Read public user profile"""
-        user = get_object_or_404(UserModel, **kwargs)
+        user = get_object_or_404(
+            UserModel.objects.select_related("reputation"), **kwargs
+        )
         serializer = PublicUserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class LeaderboardView(SparseFieldsetMixin, ListAPIView):
+    """Users ranked by reputation"""
+
+    serializer_class = LeaderboardSerializer
+    query_budget = {"GET": 6}
+    queryset = Reputation.objects.select_related("user").order_by("-score", "user_id")
+    filter_backends = ()
+
+    @swagger_auto_schema(
+        tags=("users",),
+        operation_summary="Get the reputation leaderboard",
+        responses={
+            200: LeaderboardSerializer(many=True),
+            401: "Unauthorized",
+        },
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        return super().get(request, *args, **kwargs)
+
+
 class ResetPasswordTokenView(APIView):
     """Obtain Reset Password Token"""
 
@@ -296,7 +322,9 @@ class ResetPasswordView(APIView):
                 user.set_password(serializer.validated_data["password"])
                 user.save()
                 try:
-                    outstanding_tokens = OutstandingToken.objects.filter(user=user)
+                    outstanding_tokens = OutstandingToken.objects.filter(
+                        user=user, blacklistedtoken__isnull=True
+                    )
                     blacklist = [
                         BlacklistedToken(token=token) for token in outstanding_tokens
                     ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.0.3 on 2026-10-18 12:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field_name: str):
+    """
+    Count of rows in `queryset` pointing at the outer row through `field_name`,
+    copied from flaam_api.utils.counters as of this migration.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef("pk")})
+            .order_by()
+            .values(field_name)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Discussion = apps.get_model("discussions", "Discussion")
+    DiscussionComment = apps.get_model("discussions", "DiscussionComment")
+    Discussion.objects.update(
+        upvote_count=count_subquery(
+            Discussion.upvotes.through.objects.all(), "discussion"
+        ),
+        downvote_count=count_subquery(
+            Discussion.downvotes.through.objects.all(), "discussion"
+        ),
+        view_count=count_subquery(Discussion.views.through.objects.all(), "discussion"),
+        comments_count=count_subquery(DiscussionComment.objects.all(), "discussion"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("discussions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="discussion",
+            name="comments_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="discussion",
+            name="downvote_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="discussion",
+            name="upvote_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="discussion",
+            name="view_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
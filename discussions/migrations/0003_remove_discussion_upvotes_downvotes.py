@@ -0,0 +1,22 @@
+# Generated by Django 4.0.3 on 2026-10-18 12:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("votes", "0002_copy_m2m_votes"),
+        ("discussions", "0002_discussion_counters"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="discussion",
+            name="downvotes",
+        ),
+        migrations.RemoveField(
+            model_name="discussion",
+            name="upvotes",
+        ),
+    ]
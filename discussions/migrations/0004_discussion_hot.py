@@ -0,0 +1,48 @@
+# Generated by Django 4.0.3 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+# points of a row, with the weights of flaam_api.utils.hot.HOT_WEIGHTS
+POINTS_SQL = "{row}.upvote_count - {row}.downvote_count + 0.1 * {row}.view_count"
+
+CREATE_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION hot_score(points double precision, created_at timestamptz)
+RETURNS double precision AS $$
+    SELECT sign(points) * log(greatest(abs(points), 1))
+        + (extract(epoch FROM created_at) - 1600000000) / 45000
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION discussions_discussion_hot_update() RETURNS trigger AS $$
+BEGIN
+    NEW.hot := hot_score({POINTS_SQL.format(row="NEW")}, NEW.created_at);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER discussions_discussion_hot_trigger
+BEFORE INSERT OR UPDATE OF upvote_count, downvote_count, view_count, created_at ON discussions_discussion
+FOR EACH ROW EXECUTE PROCEDURE discussions_discussion_hot_update();
+
+UPDATE discussions_discussion SET hot = hot_score({POINTS_SQL.format(row="discussions_discussion")}, created_at);
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS discussions_discussion_hot_trigger ON discussions_discussion;
+DROP FUNCTION IF EXISTS discussions_discussion_hot_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("discussions", "0003_remove_discussion_upvotes_downvotes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="discussion",
+            name="hot",
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
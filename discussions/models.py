@@ -1,8 +1,11 @@
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 
+from flaam_api.utils.counters import CounterFieldsMixin
 
-class Discussion(models.Model):
+
+class Discussion(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=255)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     idea = models.ForeignKey(
@@ -10,18 +13,31 @@ class Discussion(models.Model):
     )
     body = models.TextField(blank=True)
     draft = models.BooleanField(default=True)
-    upvotes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="upvoted_discussions"
-    )
-    downvotes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="downvoted_discussions"
-    )
+    votes = GenericRelation("votes.Vote")
     views = models.ManyToManyField(
         settings.AUTH_USER_MODEL, blank=True, related_name="viewed_discussions"
     )
+    upvote_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    downvote_count = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
+    view_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    # maintained by a database trigger, see flaam_api.utils.hot
+    hot = models.FloatField(default=0, editable=False, db_index=True)
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    counter_fields = (
+        "upvote_count",
+        "downvote_count",
+        "view_count",
+        "hot",
+        "comments_count",
+    )
+
     def __str__(self) -> str:
         return f"D{self.id}"
 
@@ -1,9 +1,17 @@
 from rest_framework import serializers
 
+from flaam_api.utils.interactions import (
+    InteractionListSerializer,
+    InteractionSerializerMixin,
+)
+from flaam_api.utils.query_metrics import MeasuredSerializerMixin
+
 from .models import Discussion, DiscussionComment
 
 
-class DiscussionSerializer(serializers.ModelSerializer):
+class DiscussionSerializer(
+    MeasuredSerializerMixin, InteractionSerializerMixin, serializers.ModelSerializer
+):
     owner_username = serializers.CharField(source="owner.username", read_only=True)
     owner_avatar = serializers.CharField(source="owner.avatar", read_only=True)
     viewed = serializers.SerializerMethodField(read_only=True)
@@ -13,21 +21,6 @@ class DiscussionSerializer(serializers.ModelSerializer):
     downvote_count = serializers.IntegerField(read_only=True)
     comments_count = serializers.IntegerField(read_only=True)
 
-    def get_viewed(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            return obj.views.filter(pk=request.user.pk).exists()
-        return False
-
-    def get_vote(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            if obj.upvotes.filter(pk=request.user.pk).exists():
-                return 1
-            elif obj.downvotes.filter(pk=request.user.pk).exists():
-                return -1
-        return 0
-
     class Meta:
         model = Discussion
         fields = (
@@ -49,9 +42,10 @@ class DiscussionSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("owner",)
+        list_serializer_class = InteractionListSerializer
 
 
-class DiscussionCommentSerializer(serializers.ModelSerializer):
+class DiscussionCommentSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     owner_avatar = serializers.CharField(source="owner.avatar", read_only=True)
     owner_username = serializers.CharField(source="owner.username", read_only=True)
 
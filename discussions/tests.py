@@ -0,0 +1,7 @@
+from flaam_api.utils import parity
+
+from .views import DiscussionListView
+
+
+class CompiledDiscussionSerializerTests(parity.CompiledSerializerParityTestCase):
+    view_class = DiscussionListView
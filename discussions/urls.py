@@ -1,5 +1,7 @@
 from django.urls import path
 
+from flaam_api.utils.async_views import as_async_view
+
 from .views import (
     DiscussionCommentDetailView,
     DiscussionCommentListView,
@@ -11,12 +13,12 @@ from .views import (
 urlpatterns = [
     path(
         "discussions",
-        DiscussionListView.as_view(),
+        as_async_view(DiscussionListView),
         name="discussion-list",
     ),
     path(
         "discussion/<int:pk>",
-        DiscussionDetailView.as_view(),
+        as_async_view(DiscussionDetailView),
         name="discussion-detail",
     ),
     path(
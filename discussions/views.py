@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
@@ -11,7 +11,17 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.models import Reputation
+from flaam_api.utils.counters import increment
+from flaam_api.utils.mixins import (
+    CachedListMixin,
+    CompiledListMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+)
 from flaam_api.utils.permissions import IsOwnerOrReadOnly
+from flaam_api.utils.view_buffer import view_buffer
+from votes.models import Vote
 
 from .filters import DiscussionCommentFilterSet, DiscussionFilterSet
 from .models import Discussion, DiscussionComment
@@ -20,33 +30,22 @@ from .serializers import DiscussionCommentSerializer, DiscussionSerializer
 UserModel = get_user_model()
 
 
-class DiscussionListView(ListCreateAPIView):
+class DiscussionListView(
+    SparseFieldsetMixin, CachedListMixin, CompiledListMixin, ListCreateAPIView
+):
     """
     List all discussions, or create a new discussion.
     """
 
     serializer_class = DiscussionSerializer
-    queryset = (
-        Discussion.objects.all()
-        .select_related("owner")
-        .prefetch_related(
-            "upvotes",
-            "downvotes",
-            "views",
-            "comments",
-        )
-        .annotate(
-            upvote_count=Count("upvotes"),
-            downvote_count=Count("downvotes"),
-            view_count=Count("views"),
-            comments_count=Count("comments"),
-        )
-    )
+    query_budget = {"GET": 10}
+    queryset = Discussion.objects.all().select_related("owner")
     ordering = ("-created_at",)
     filterset_class = DiscussionFilterSet
 
     search_fields = ("title", "description", "idea__title")
     ordering_fields = (
+        "hot",
         "upvote_count",
         "downvote_count",
         "view_count",
@@ -82,42 +81,52 @@ class DiscussionListView(ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class DiscussionDetailView(RetrieveUpdateDestroyAPIView):
+class DiscussionDetailView(
+    SparseFieldsetMixin, ConditionalGetMixin, RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve, update or delete a discussion instance.
     """
 
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly)
     serializer_class = DiscussionSerializer
-    queryset = (
-        Discussion.objects.all()
-        .select_related("owner")
-        .prefetch_related(
-            "upvotes",
-            "downvotes",
-            "views",
-            "comments",
-        )
-        .annotate(
-            upvote_count=Count("upvotes"),
-            downvote_count=Count("downvotes"),
-            view_count=Count("views"),
-            comments_count=Count("comments"),
-        )
+    query_budget = {"GET": 8}
+    queryset = Discussion.objects.all().select_related("owner")
+
+    etag_fields = (
+        "updated_at",
+        "upvote_count",
+        "downvote_count",
+        "view_count",
+        "comments_count",
     )
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            Reputation.objects.retract(instance)
+            instance.delete()
+
     @swagger_auto_schema(
         tags=("discussions",),
         operation_summary="Get discussion",
         responses={
             200: DiscussionSerializer,
+            304: "Not modified.",
             401: "Unauthorized.",
             404: "Not found.",
         },
     )
     def get(self, request: Request, *args, **kwargs) -> Response:
-        self.get_object().views.add(request.user)
-        return super().get(request, *args, **kwargs)
+        response = self.get_not_modified_response(request)
+        if response is not None:
+            return response
+        instance = self.get_object()
+        view_buffer.record(instance, request.user)
+        data = self.get_serializer(instance).data
+        # the view is written behind, so reflect it in the response right away
+        if "viewed" in data:
+            data["viewed"] = True
+        return Response(data)
 
     @swagger_auto_schema(
         tags=("discussions",),
@@ -158,7 +167,9 @@ class DiscussionDetailView(RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
-class DiscussionCommentListView(ListCreateAPIView):
+class DiscussionCommentListView(
+    SparseFieldsetMixin, CachedListMixin, ListCreateAPIView
+):
     """
     List all discussion comments, or create a new discussion comment.
     """
@@ -171,7 +182,10 @@ class DiscussionCommentListView(ListCreateAPIView):
     ordering_fields = ("created_at", "updated_at")
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(owner=self.request.user)
+            increment(comment.discussion, comments_count=1)
+            Reputation.objects.adjust(comment.owner_id, comments=1)
 
     @swagger_auto_schema(
         tags=("discussion-comments",),
@@ -197,7 +211,7 @@ class DiscussionCommentListView(ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class DiscussionCommentDetailView(RetrieveUpdateDestroyAPIView):
+class DiscussionCommentDetailView(SparseFieldsetMixin, RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a discussion comment instance.
     """
@@ -206,6 +220,12 @@ class DiscussionCommentDetailView(RetrieveUpdateDestroyAPIView):
     serializer_class = DiscussionCommentSerializer
     queryset = DiscussionComment.objects.all().select_related("owner")
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            increment(instance.discussion, comments_count=-1)
+            Reputation.objects.adjust(instance.owner_id, comments=-1)
+            instance.delete()
+
     @swagger_auto_schema(
         tags=("discussion-comments",),
         operation_summary="Get discussion comment",
@@ -284,18 +304,8 @@ class VoteDiscussionView(APIView):
     def post(self, request: Request, pk: int, *args, **kwargs) -> Response:
         discussion = get_object_or_404(Discussion, pk=pk)
         value = request.query_params.get("value")
-
-        value = request.query_params.get("value")
-        if value == "0":
-            discussion.downvotes.remove(request.user)
-            discussion.upvotes.remove(request.user)
-        elif value == "1":
-            discussion.upvotes.add(request.user)
-            discussion.downvotes.remove(request.user)
-        elif value == "-1":
-            discussion.downvotes.add(request.user)
-            discussion.upvotes.remove(request.user)
-        else:
+        if value not in ("-1", "0", "1"):
             raise ValidationError("Invalid vote value.")
+        Vote.objects.cast(discussion, request.user, int(value))
 
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import FeedItem
+
+
+class FeedItemAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "content_type", "object_id", "created_at")
+    list_display_links = list_display
+    list_filter = ("content_type",)
+    raw_id_fields = ("user", "owner")
+    readonly_fields = ("id", "created_at")
+    search_fields = ("user__username",)
+    ordering = ("-created_at",)
+
+
+admin.site.register(FeedItem, FeedItemAdmin)
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from feeds.models import FeedItem
+from ideas.models import Idea
+from implementations.models import Implementation
+
+
+class Command(BaseCommand):
+    help = "Fan out recently published ideas and implementations to the feeds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+        sources = (
+            (Idea.objects.prefetch_related("tags"), lambda idea: idea.tags.all()),
+            (
+                Implementation.objects.prefetch_related("idea__tags"),
+                lambda implementation: implementation.idea.tags.all(),
+            ),
+        )
+        written = 0
+        for queryset, get_tags in sources:
+            for target in queryset.filter(draft=False, created_at__gte=since):
+                with transaction.atomic():
+                    written += FeedItem.objects.publish(
+                        target,
+                        [tag.pk for tag in get_tags(target)],
+                        published_at=target.created_at,
+                    )
+        self.stdout.write(self.style.SUCCESS(f"{written} feed items written"))
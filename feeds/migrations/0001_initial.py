@@ -0,0 +1,107 @@
+# Generated by Django 4.0.3 on 2026-10-18 13:03
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+                (
+                    "tag_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(),
+                        blank=True,
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_items",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="feeditem",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="feed_item_timeline_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feeditem",
+            index=models.Index(
+                condition=models.Q(("user__isnull", True)),
+                fields=["-created_at", "-id"],
+                name="feed_item_broadcast_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feeditem",
+            index=django.contrib.postgres.indexes.GinIndex(
+                condition=models.Q(("user__isnull", True)),
+                fields=["tag_ids"],
+                name="feed_item_tag_ids_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="feeditem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "content_type", "object_id"), name="unique_feed_item"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="feeditem",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", True)),
+                fields=("content_type", "object_id"),
+                name="unique_broadcast_feed_item",
+            ),
+        ),
+    ]
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, models
+from django.db.models import Q
+from django.utils import timezone
+
+FAN_OUT_SQL = """
+INSERT INTO {item_table}
+    (user_id, content_type_id, object_id, owner_id, tag_ids, created_at)
+SELECT recipient.id, %s, %s, %s, '{{}}', %s
+FROM ({recipients}) AS recipient (id)
+ON CONFLICT DO NOTHING
+"""
+
+
+class FeedItemManager(models.Manager):
+    def recipients(self, owner_id: int, tag_ids):
+        """
+        Ids of the users following `owner_id` or subscribed to any of
+        `tag_ids`, excluding the owner.
+        """
+        UserModel = get_user_model()
+        followers = (
+            UserModel.following.through.objects.filter(to_user_id=owner_id)
+            .exclude(from_user_id=owner_id)
+            .values_list("from_user_id")
+        )
+        subscribers = (
+            UserModel.favourite_tags.through.objects.filter(tag_id__in=list(tag_ids))
+            .exclude(user_id=owner_id)
+            .values_list("user_id")
+        )
+        return followers.union(subscribers)
+
+    def publish(self, target, tag_ids, published_at=None) -> int:
+        """
+        Fan `target` out to the timelines of its owner's followers and of
+        the users subscribed to any of `tag_ids`, in a single statement.
+
+        Past `FEED_FANOUT_LIMIT` recipients, one broadcast item (without a
+        user) is stored instead, and matched against the reader's follows and
+        favourite tags when the feed is read.
+        Returns the number of items written.
+        """
+        tag_ids = list(tag_ids)
+        recipients = self.recipients(target.owner_id, tag_ids)
+        content_type = ContentType.objects.get_for_model(target)
+        published_at = published_at or timezone.now()
+
+        limit = settings.FEED_FANOUT_LIMIT
+        if len(recipients[: limit + 1]) > limit:
+            _, created = self.get_or_create(
+                user=None,
+                content_type=content_type,
+                object_id=target.pk,
+                defaults={
+                    "owner_id": target.owner_id,
+                    "tag_ids": tag_ids,
+                    "created_at": published_at,
+                },
+            )
+            return int(created)
+
+        sql, params = recipients.query.sql_with_params()
+        sql = FAN_OUT_SQL.format(
+            item_table=connection.ops.quote_name(self.model._meta.db_table),
+            recipients=sql,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                (content_type.pk, target.pk, target.owner_id, published_at, *params),
+            )
+            return cursor.rowcount
+
+    def retract(self, target) -> None:
+        """Remove `target` from every timeline."""
+        self.filter(
+            content_type=ContentType.objects.get_for_model(target),
+            object_id=target.pk,
+        ).delete()
+
+    def for_user(self, user):
+        """
+        The timeline of `user`, plus the broadcast items of the users they
+        follow or tagged with their favourite tags.
+        """
+        tag_ids = list(user.favourite_tags.values_list("pk", flat=True))
+        broadcasts = Q(owner__in=user.following.values("pk"))
+        if tag_ids:
+            broadcasts |= Q(tag_ids__overlap=tag_ids)
+        return self.filter(Q(user=user) | Q(user__isnull=True) & broadcasts)
+
+
+class FeedItem(models.Model):
+    # null for broadcast items, which are matched when the feed is read
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="feed_items",
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey("content_type", "object_id")
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    # only stored on broadcast items
+    tag_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = FeedItemManager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "content_type", "object_id"), name="unique_feed_item"
+            ),
+            models.UniqueConstraint(
+                fields=("content_type", "object_id"),
+                condition=Q(user__isnull=True),
+                name="unique_broadcast_feed_item",
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("user", "-created_at", "-id"), name="feed_item_timeline_idx"
+            ),
+            models.Index(
+                fields=("-created_at", "-id"),
+                condition=Q(user__isnull=True),
+                name="feed_item_broadcast_idx",
+            ),
+            GinIndex(
+                fields=("tag_ids",),
+                condition=Q(user__isnull=True),
+                name="feed_item_tag_ids_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"FEED{self.id}"
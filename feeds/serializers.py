@@ -0,0 +1,64 @@
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+
+from flaam_api.utils.query_metrics import MeasuredSerializerMixin
+from ideas.models import Idea, tag_ids_subquery
+from ideas.serializers import IdeaSerializer
+from implementations.models import Implementation
+from implementations.serializers import ImplementationSerializer
+
+from .models import FeedItem
+
+
+def feed_types() -> dict:
+    """
+    Map of content type id -> (type name, queryset, serializer class)
+    for everything that can show up in a feed.
+    """
+    return {
+        ContentType.objects.get_for_model(Idea).pk: (
+            "idea",
+            Idea.objects.select_related("owner").annotate(tag_ids=tag_ids_subquery()),
+            IdeaSerializer,
+        ),
+        ContentType.objects.get_for_model(Implementation).pk: (
+            "implementation",
+            Implementation.objects.select_related("owner", "idea").annotate(
+                tag_ids=tag_ids_subquery("idea")
+            ),
+            ImplementationSerializer,
+        ),
+    }
+
+
+class FeedItemListSerializer(serializers.ListSerializer):
+    """
+    Loads the targets of a page of feed items with one query per type and
+    renders them with their own serializers. Items whose target is gone are
+    left out.
+    """
+
+    def to_representation(self, data):
+        items = list(data)
+        for content_type_id, (name, queryset, serializer_class) in feed_types().items():
+            typed = {
+                i.object_id: i for i in items if i.content_type_id == content_type_id
+            }
+            if not typed:
+                continue
+            objects = list(queryset.filter(pk__in=typed))
+            rendered = serializer_class(objects, many=True, context=self.context).data
+            for obj, representation in zip(objects, rendered):
+                typed[obj.pk].type = name
+                typed[obj.pk].object = representation
+        return super().to_representation([i for i in items if hasattr(i, "object")])
+
+
+class FeedItemSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
+    type = serializers.CharField(read_only=True)
+    object = serializers.DictField(read_only=True)
+
+    class Meta:
+        model = FeedItem
+        fields = ("id", "type", "created_at", "object")
+        list_serializer_class = FeedItemListSerializer
@@ -0,0 +1,35 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.generics import ListAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import FeedItem
+from .serializers import FeedItemSerializer
+
+
+class FeedView(ListAPIView):
+    """
+    Ideas and implementations published by the users the requesting user
+    follows, or tagged with their favourite tags, newest first.
+    """
+
+    serializer_class = FeedItemSerializer
+    # user, favourite tags and items, then for ideas and for implementations
+    # the objects and their votes, views and bookmarks
+    query_budget = {"GET": 11}
+    pagination_mode = "cursor"
+    filter_backends = ()
+
+    def get_queryset(self):
+        return FeedItem.objects.for_user(self.request.user).order_by("-created_at")
+
+    @swagger_auto_schema(
+        tags=("feed",),
+        operation_summary="Get the user's feed",
+        responses={
+            200: FeedItemSerializer(many=True),
+            401: "Unauthorized.",
+        },
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        return super().get(request, *args, **kwargs)
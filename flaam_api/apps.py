@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.models.signals import m2m_changed
+
+
+class FlaamApiConfig(AppConfig):
+    name = "flaam_api"
+
+    def ready(self):
+        from .utils import response_cache
+
+        m2m_changed.connect(response_cache.on_m2m_change)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "flaam_api.settings")
+# serve the read heavy views from a thread pool, see flaam_api.utils.async_views
+os.environ.setdefault("ASYNC_VIEWS", "true")
 
 application = get_asgi_application()
@@ -0,0 +1,219 @@
+import threading
+from collections import deque
+from time import monotonic
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became available within the acquire timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded, thread safe pool of psycopg2 connections.
+
+    At most `size` connections are open at once, connections are created on
+    demand and reused most recently released first. Acquiring waits up to
+    `timeout` seconds for a connection to be released before raising
+    `PoolTimeout`.
+
+    Connections idle for more than `check_interval` seconds are checked with
+    a `SELECT 1` before being handed out, connections older than
+    `max_lifetime` seconds are replaced, and connections released in a
+    broken or unfinished transaction state are rolled back or dropped.
+    """
+
+    def __init__(self, connect, size, timeout, check_interval, max_lifetime):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.max_lifetime = max_lifetime
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, released at)
+        self._created_at = {}  # connection -> creation time, for open connections
+        self._connecting = 0
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.failed_checks = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def acquire(self):
+        """
+        A healthy connection, waiting for one to be released when `size`
+        connections are in use.
+        """
+        started = monotonic()
+        deadline = started + self.timeout
+        while True:
+            with self._lock:
+                connection, released_at = self._take(deadline)
+                wait = monotonic() - started
+            if connection is None:
+                connection = self._create()
+            elif not self._healthy(connection, released_at):
+                self._discard(connection)
+                continue
+            with self._lock:
+                self.checkouts += 1
+                self.wait_time += wait
+                self.max_wait_time = max(self.max_wait_time, wait)
+            return connection
+
+    def _take(self, deadline):
+        """
+        An idle connection and its release time, or `(None, None)` when a new
+        connection may be opened. Called with the lock held.
+        """
+        while True:
+            if self._idle:
+                return self._idle.pop()
+            if len(self._created_at) + self._connecting < self.size:
+                self._connecting += 1
+                return None, None
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                self.timeouts += 1
+                raise PoolTimeout(
+                    f"No database connection available within {self.timeout}s "
+                    f"({self.size} in use)."
+                )
+            self._lock.wait(remaining)
+
+    def _create(self):
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._lock:
+                self._connecting -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._created_at[connection] = monotonic()
+            self.created += 1
+        return connection
+
+    def _healthy(self, connection, released_at) -> bool:
+        now = monotonic()
+        if connection.closed or now - self._created_at[connection] > self.max_lifetime:
+            return False
+        if now - released_at <= self.check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except psycopg2.Error:
+            with self._lock:
+                self.failed_checks += 1
+            return False
+        if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            # the check opened a transaction outside of autocommit
+            connection.rollback()
+        return True
+
+    def release(self, connection) -> None:
+        """Give `connection` back, or drop it when it can not be reused."""
+        if not connection.closed:
+            status = connection.info.transaction_status
+            if status not in (
+                extensions.TRANSACTION_STATUS_IDLE,
+                extensions.TRANSACTION_STATUS_UNKNOWN,
+            ):
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    pass
+        reusable = not connection.closed
+        if reusable:
+            status = connection.info.transaction_status
+            reusable = status == extensions.TRANSACTION_STATUS_IDLE
+        expired = monotonic() - self._created_at[connection] > self.max_lifetime
+        if not reusable or expired:
+            self._discard(connection)
+            return
+        with self._lock:
+            self._idle.append((connection, monotonic()))
+            self._lock.notify()
+
+    def _discard(self, connection) -> None:
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self._lock:
+            self._created_at.pop(connection, None)
+            self.discarded += 1
+            self._lock.notify()
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_connections = len(self._created_at) + self._connecting
+            idle = len(self._idle)
+            return {
+                "size": self.size,
+                "open": open_connections,
+                "in_use": open_connections - idle,
+                "idle": idle,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "failed_checks": self.failed_checks,
+                "wait_seconds_total": self.wait_time,
+                "wait_seconds_max": self.max_wait_time,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, settings_dict: dict, connect) -> ConnectionPool:
+    """
+    The process wide pool of the database `alias`. Changing the database
+    it points to (as the test runner does) switches to another pool.
+    """
+    key = (alias, *(settings_dict[k] for k in ("NAME", "USER", "HOST", "PORT")))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = settings_dict.get("POOL", {})
+                pool = _pools[key] = ConnectionPool(
+                    connect,
+                    size=options.get("SIZE", 10),
+                    timeout=options.get("TIMEOUT", 10),
+                    check_interval=options.get("CHECK_INTERVAL", 30),
+                    max_lifetime=options.get("MAX_LIFETIME", 3600),
+                )
+    return pool
+
+
+def close_pools() -> None:
+    """Close the idle connections of every pool of this process."""
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+def pool_stats() -> dict:
+    """Metrics of the pools of this process, by database alias."""
+    stats = {}
+    for (alias, *_), pool in list(_pools.items()):
+        stats[alias] = pool.stats()
+    return stats
@@ -0,0 +1,33 @@
+from django.db.backends.postgresql import base
+
+from ..pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend taking its connections from a process wide
+    `ConnectionPool`, configured by the `POOL` entry of the database settings.
+
+    Closing the connection, as Django does at the end of every request with
+    `CONN_MAX_AGE = 0`, gives it back to the pool instead, so any number of
+    threads share at most `POOL["SIZE"]` connections per process.
+    """
+
+    def get_pool(self):
+        return get_pool(self.alias, self.settings_dict, self._connect)
+
+    def _connect(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool().acquire()
+        # set by the parent on new connections, see there
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool().release(self.connection)
@@ -0,0 +1,49 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+# whether the current request reads from the replicas, see ReplicaMiddleware
+use_replica = ContextVar("use_replica", default=False)
+# whether the current request reads from the primary because the user wrote
+# something in the last REPLICA_PIN_SECONDS
+pinned = ContextVar("pinned", default=False)
+
+
+def _pin_key(user_id) -> str:
+    return f"replica:pinned:{user_id}"
+
+
+def pin_to_primary(user_id) -> None:
+    """Read from the primary for `user_id` for `REPLICA_PIN_SECONDS`."""
+    caches[settings.REPLICA_PIN_CACHE].set(
+        _pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned(user_id) -> bool:
+    return bool(caches[settings.REPLICA_PIN_CACHE].get(_pin_key(user_id)))
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of requests flagged by `ReplicaMiddleware` to a random
+    database of `DATABASE_REPLICAS`, and everything else to the primary.
+    Migrations only run on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
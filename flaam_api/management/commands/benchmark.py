@@ -0,0 +1,811 @@
+import json
+import random
+import re
+import statistics
+import subprocess
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from time import perf_counter
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from discussions.models import Discussion, DiscussionComment
+from feeds.models import FeedItem
+from flaam_api.db.pool import close_pools
+from flaam_api.utils.query_metrics import endpoint_stats, reset_endpoint_stats
+from flaam_api.utils.view_buffer import view_buffer
+from ideas.models import Idea
+from implementations.models import Implementation, ImplementationComment
+from tags.models import Tag
+
+from .generate_data import PASSWORD
+
+UserModel = get_user_model()
+
+API_PREFIX = "api/v1/"
+
+# share of the requests going to the most popular objects
+POPULAR_RATIO = 0.8
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency (p50, p95, p99), queries per request and "
+        "throughput of every API endpoint, in process through the test client, "
+        "on a copy of the current database (see `generate_data`), made from it "
+        "as a template and dropped afterwards. Requests commit their writes, "
+        "as in production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=50, help="Measured requests per scenario."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=3, help="Unmeasured requests per scenario."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="Only run the scenarios containing this text, repeatable.",
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the response cache between requests, cleared by default "
+            "to measure the views themselves.",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--compare",
+            help="Compare with the results of this JSON file, failing on "
+            "regressions.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20,
+            help="Percent of p95 latency increase counted as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2 to compute percentiles.")
+        if not Idea.objects.exists():
+            raise CommandError("There is no data, run `generate_data` first.")
+        if not FeedItem.objects.exists():
+            self.stderr.write("The feeds are empty, run `backfill_feeds` first.")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+
+        self.rng = random.Random(options["seed"])
+        self.client = APIClient(raise_request_exception=False)
+        self.counter = 0
+
+        results = {}
+        email_backend = "django.core.mail.backends.locmem.EmailBackend"
+        # views are flushed after each scenario, not by the timer during one
+        flush_interval, view_buffer.flush_interval = view_buffer.flush_interval, 0
+        # every read goes to the copy
+        with override_settings(
+            EMAIL_BACKEND=email_backend,
+            QUERY_BUDGET_STRICT=False,
+            DATABASE_REPLICAS=[],
+        ), self.database_copy():
+            self.setup()
+            only = options["only"]
+            scenarios = [
+                scenario
+                for scenario in self.scenarios()
+                if not only or any(text in scenario[0] for text in only)
+            ]
+            self.check_coverage(self.scenarios())
+            for name, method, route, build in scenarios:
+                results[name] = self.run(method, route, build, options)
+                self.report(name, results[name])
+                view_buffer.flush()
+        view_buffer.flush_interval = flush_interval
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(self.document(results, options), file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            if baseline["dataset"] != self.dataset():
+                self.stderr.write("The baseline was measured on another dataset.")
+            self.compare(baseline["scenarios"], results, options["threshold"])
+
+    @contextmanager
+    def database_copy(self):
+        """
+        Point the default database at a copy of it for the block, created
+        with the database as its template and dropped afterwards. Nothing
+        else may be connected to the database while it is copied.
+        """
+        connection = connections["default"]
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                "The benchmark copies the database, it needs PostgreSQL."
+            )
+        name = connection.settings_dict["NAME"]
+        copy = f"{name}_benchmark"
+        quote_name = connection.ops.quote_name
+        connection.close()
+        close_pools()
+        with connection._nodb_cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {quote_name(copy)}")
+            try:
+                cursor.execute(
+                    f"CREATE DATABASE {quote_name(copy)} TEMPLATE {quote_name(name)}"
+                )
+            except DatabaseError as error:
+                raise CommandError(f"Could not copy the database: {error}")
+
+        # the connections of every thread share this settings dict
+        connection.settings_dict["NAME"] = copy
+        try:
+            yield
+        finally:
+            connection.close()
+            close_pools()
+            connection.settings_dict["NAME"] = name
+            with connection._nodb_cursor() as cursor:
+                cursor.execute(f"DROP DATABASE {quote_name(copy)}")
+
+    # fixtures
+
+    def setup(self):
+        """
+        The benchmark user, with objects of their own to update and delete,
+        and samples of the popular and of all objects to read.
+        """
+        self.user = self.create_user("benchmark", is_staff=True)
+        self.token = str(AccessToken.for_user(self.user))
+
+        self.samples = {}
+        for model, popularity in (
+            (UserModel, "-reputation__score"),
+            (Tag, "-favorited_by"),
+            (Idea, "-view_count"),
+            (Implementation, "-view_count"),
+            (Discussion, "-view_count"),
+            (ImplementationComment, "-implementation__view_count"),
+            (DiscussionComment, "-discussion__view_count"),
+        ):
+            ids = model.objects.values_list("pk", flat=True)
+            self.samples[model] = (
+                list(ids.order_by(popularity)[:100]),
+                list(ids.order_by("?")[:1000]),
+            )
+        self.user.following.add(*self.samples[UserModel][0][:50])
+        self.user.favourite_tags.add(*self.samples[Tag][0][:5])
+
+        other = UserModel.objects.exclude(pk=self.user.pk).first()
+        self.idea = self.create_idea()
+        self.implementation = Implementation.objects.create(
+            title="Benchmark implementation", owner=other, idea=self.idea
+        )
+        self.own_implementation = Implementation.objects.create(
+            title="Benchmark implementation",
+            owner=self.user,
+            idea_id=self.pick(Idea),
+        )
+        self.discussion = Discussion.objects.create(
+            title="Benchmark discussion", owner=self.user, idea_id=self.pick(Idea)
+        )
+        self.implementation_comment = self.create_implementation_comment()
+        self.discussion_comment = self.create_discussion_comment()
+
+    def pick(self, model) -> int:
+        popular, sample = self.samples[model]
+        if popular and self.rng.random() < POPULAR_RATIO:
+            return self.rng.choice(popular)
+        return self.rng.choice(sample)
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def create_user(self, username=None, **fields):
+        username = username or self.unique("benchuser")
+        user = UserModel(username=username, email=f"{username}@example.com", **fields)
+        user.set_password(PASSWORD)
+        user.save()
+        return user
+
+    def create_idea(self):
+        idea = Idea.objects.create(
+            title="Benchmark idea",
+            owner=self.user,
+            description="Benchmark",
+            milestones=[["0123abcd", "Benchmark milestone"]],
+            draft=False,
+        )
+        idea.tags.set(self.samples[Tag][0][:3])
+        return idea
+
+    def create_implementation_comment(self):
+        return ImplementationComment.objects.create(
+            implementation_id=self.pick(Implementation), owner=self.user, body="Hi"
+        )
+
+    def create_discussion_comment(self):
+        return DiscussionComment.objects.create(
+            discussion_id=self.pick(Discussion), owner=self.user, body="Hi"
+        )
+
+    # scenarios
+
+    def scenarios(self) -> list:
+        """
+        `(name, method, route, build)`, `build()` returns the url kwargs,
+        query, body and user (`None` for anonymous) of the next request.
+        """
+        pick = self.pick
+
+        def request(kwargs=None, query=None, data=None, user=True):
+            return kwargs or {}, query or {}, data, self.user if user is True else user
+
+        def reset_token():
+            # the token depends on the password and last login, changed since
+            user = UserModel.objects.get(pk=self.user.pk)
+            uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+            token = PasswordResetTokenGenerator().make_token(user)
+            return request({"uidb64": uidb64, "token": token}, user=None)
+
+        def reset_password():
+            kwargs = reset_token()[0]
+            return request(kwargs, data={"password": PASSWORD}, user=None)
+
+        recently = (timezone.now() - timedelta(days=30)).isoformat()
+        vote = ("-1", "0", "1")
+        return [
+            # accounts
+            (
+                "login",
+                "POST",
+                "accounts/login",
+                lambda: request(
+                    data={"username": self.user.username, "password": PASSWORD},
+                    user=None,
+                ),
+            ),
+            (
+                "login refresh",
+                "POST",
+                "accounts/login/refresh",
+                lambda: request(
+                    data={"refresh": str(RefreshToken.for_user(self.user))}, user=None
+                ),
+            ),
+            (
+                "login verify",
+                "POST",
+                "accounts/login/verify",
+                lambda: request(data={"token": self.token}, user=None),
+            ),
+            (
+                "signup",
+                "POST",
+                "accounts/users",
+                lambda: request(
+                    data={
+                        "username": self.unique("signup"),
+                        "email": f"{self.unique('signup')}@example.com",
+                        "password": PASSWORD,
+                    },
+                    user=None,
+                ),
+            ),
+            (
+                "user exists",
+                "GET",
+                "accounts/user/exists",
+                lambda: request(query={"username": self.user.username}, user=None),
+            ),
+            ("leaderboard", "GET", "accounts/users/leaderboard", request),
+            ("profile", "GET", "accounts/user/profile", request),
+            (
+                "profile update",
+                "PATCH",
+                "accounts/user/profile",
+                lambda: request(data={"status": self.unique("status ")}),
+            ),
+            (
+                "profile delete",
+                "DELETE",
+                "accounts/user/profile",
+                lambda: request(user=self.create_user()),
+            ),
+            (
+                "public profile",
+                "GET",
+                "accounts/user/<int:pk>",
+                lambda: request({"pk": pick(UserModel)}),
+            ),
+            (
+                "public profile by username",
+                "GET",
+                "accounts/user/<str:username>",
+                lambda: request({"username": self.user.username}),
+            ),
+            (
+                "password reset request",
+                "POST",
+                "accounts/password/reset",
+                lambda: request(data={"email": self.user.email}, user=None),
+            ),
+            (
+                "password reset check",
+                "GET",
+                "accounts/password/reset/<str:uidb64>/<str:token>",
+                reset_token,
+            ),
+            (
+                "password reset",
+                "POST",
+                "accounts/password/reset/<str:uidb64>/<str:token>",
+                reset_password,
+            ),
+            # ideas
+            ("ideas", "GET", "ideas", request),
+            (
+                "ideas hot",
+                "GET",
+                "ideas",
+                lambda: request(query={"ordering": "-hot"}),
+            ),
+            (
+                "ideas search",
+                "GET",
+                "ideas",
+                lambda: request(query={"search": self.rng.choice(("app", "web"))}),
+            ),
+            (
+                "ideas by tag",
+                "GET",
+                "ideas",
+                lambda: request(query={"tags": pick(Tag)}),
+            ),
+            (
+                "idea create",
+                "POST",
+                "ideas",
+                lambda: request(
+                    data={
+                        "title": "Benchmark idea",
+                        "description": "Benchmark",
+                        "body": "Benchmark",
+                        "tags": self.samples[Tag][0][:3],
+                        "milestones": ["First", "Second"],
+                    }
+                ),
+            ),
+            (
+                "ideas export",
+                "GET",
+                "ideas/export",
+                lambda: request(query={"updated_since": recently}),
+            ),
+            ("idea", "GET", "idea/<int:pk>", lambda: request({"pk": pick(Idea)})),
+            (
+                "idea update",
+                "PATCH",
+                "idea/<int:pk>",
+                lambda: request({"pk": self.idea.pk}, data={"body": "Updated"}),
+            ),
+            (
+                "idea delete",
+                "DELETE",
+                "idea/<int:pk>",
+                lambda: request({"pk": self.create_idea().pk}),
+            ),
+            (
+                "idea vote",
+                "POST",
+                "idea/<int:pk>/vote",
+                lambda: request(
+                    {"pk": pick(Idea)}, query={"value": self.rng.choice(vote)}
+                ),
+            ),
+            (
+                "idea bookmark",
+                "POST",
+                "idea/<int:pk>/bookmark",
+                lambda: request({"pk": pick(Idea)}),
+            ),
+            (
+                "idea unbookmark",
+                "DELETE",
+                "idea/<int:pk>/bookmark",
+                lambda: request({"pk": pick(Idea)}),
+            ),
+            # implementations
+            ("implementations", "GET", "implementations", request),
+            (
+                "implementations of idea",
+                "GET",
+                "implementations",
+                lambda: request(query={"idea": pick(Idea)}),
+            ),
+            (
+                "implementation create",
+                "POST",
+                "implementations",
+                lambda: request(
+                    data={
+                        "title": "Benchmark implementation",
+                        "idea": pick(Idea),
+                        "description": "Benchmark",
+                        "repo_url": "https://github.com/example/benchmark",
+                    }
+                ),
+            ),
+            (
+                "implementations export",
+                "GET",
+                "implementations/export",
+                lambda: request(query={"updated_since": recently}),
+            ),
+            (
+                "implementation",
+                "GET",
+                "implementation/<int:pk>",
+                lambda: request({"pk": pick(Implementation)}),
+            ),
+            (
+                "implementation update",
+                "PATCH",
+                "implementation/<int:pk>",
+                lambda: request(
+                    {"pk": self.own_implementation.pk}, data={"body": "Updated"}
+                ),
+            ),
+            (
+                "implementation delete",
+                "DELETE",
+                "implementation/<int:pk>",
+                lambda: request(
+                    {
+                        "pk": Implementation.objects.create(
+                            title="Deleted", owner=self.user, idea_id=pick(Idea)
+                        ).pk
+                    }
+                ),
+            ),
+            (
+                "implementation vote",
+                "POST",
+                "implementation/<int:pk>/vote",
+                lambda: request(
+                    {"pk": pick(Implementation)},
+                    query={"value": self.rng.choice(vote)},
+                ),
+            ),
+            *(
+                (
+                    f"implementation {prefix}{action}",
+                    method,
+                    f"implementation/<int:pk>/{action}",
+                    lambda: request({"pk": self.implementation.pk}),
+                )
+                for action in ("accept", "validate")
+                for prefix, method in (("", "POST"), ("un", "DELETE"))
+            ),
+            (
+                "implementation comments",
+                "GET",
+                "implementation/comments",
+                lambda: request(query={"implementation": pick(Implementation)}),
+            ),
+            (
+                "implementation comment create",
+                "POST",
+                "implementation/comments",
+                lambda: request(
+                    data={"implementation": pick(Implementation), "body": "Hi"}
+                ),
+            ),
+            (
+                "implementation comment",
+                "GET",
+                "implementation/comment/<int:pk>",
+                lambda: request({"pk": pick(ImplementationComment)}),
+            ),
+            (
+                "implementation comment update",
+                "PATCH",
+                "implementation/comment/<int:pk>",
+                lambda: request(
+                    {"pk": self.implementation_comment.pk}, data={"body": "Hey"}
+                ),
+            ),
+            (
+                "implementation comment delete",
+                "DELETE",
+                "implementation/comment/<int:pk>",
+                lambda: request({"pk": self.create_implementation_comment().pk}),
+            ),
+            # discussions
+            ("discussions", "GET", "discussions", request),
+            (
+                "discussions of idea",
+                "GET",
+                "discussions",
+                lambda: request(query={"idea": pick(Idea)}),
+            ),
+            (
+                "discussion create",
+                "POST",
+                "discussions",
+                lambda: request(
+                    data={"title": "Benchmark", "idea": pick(Idea), "body": "Hi"}
+                ),
+            ),
+            (
+                "discussion",
+                "GET",
+                "discussion/<int:pk>",
+                lambda: request({"pk": pick(Discussion)}),
+            ),
+            (
+                "discussion update",
+                "PATCH",
+                "discussion/<int:pk>",
+                lambda: request({"pk": self.discussion.pk}, data={"body": "Hey"}),
+            ),
+            (
+                "discussion delete",
+                "DELETE",
+                "discussion/<int:pk>",
+                lambda: request(
+                    {
+                        "pk": Discussion.objects.create(
+                            title="Deleted", owner=self.user, idea_id=pick(Idea)
+                        ).pk
+                    }
+                ),
+            ),
+            (
+                "discussion vote",
+                "POST",
+                "discussion/<int:pk>/vote",
+                lambda: request(
+                    {"pk": pick(Discussion)}, query={"value": self.rng.choice(vote)}
+                ),
+            ),
+            (
+                "discussion comments",
+                "GET",
+                "discussion/comments",
+                lambda: request(query={"discussion": pick(Discussion)}),
+            ),
+            (
+                "discussion comment create",
+                "POST",
+                "discussion/comments",
+                lambda: request(data={"discussion": pick(Discussion), "body": "Hi"}),
+            ),
+            (
+                "discussion comment",
+                "GET",
+                "discussion/comment/<int:pk>",
+                lambda: request({"pk": pick(DiscussionComment)}),
+            ),
+            (
+                "discussion comment update",
+                "PATCH",
+                "discussion/comment/<int:pk>",
+                lambda: request(
+                    {"pk": self.discussion_comment.pk}, data={"body": "Hey"}
+                ),
+            ),
+            (
+                "discussion comment delete",
+                "DELETE",
+                "discussion/comment/<int:pk>",
+                lambda: request({"pk": self.create_discussion_comment().pk}),
+            ),
+            # tags
+            ("tags", "GET", "tags", request),
+            (
+                "tags favourited",
+                "GET",
+                "tags",
+                lambda: request(query={"favourited_by": self.user.pk}),
+            ),
+            (
+                "tag create",
+                "POST",
+                "tags",
+                lambda: request(data={"name": self.unique("benchmark-")}),
+            ),
+            (
+                "tags autocomplete",
+                "GET",
+                "tags/autocomplete",
+                lambda: request(query={"prefix": self.rng.choice(("a", "da", "we"))}),
+            ),
+            ("tag", "GET", "tag/<int:pk>", lambda: request({"pk": pick(Tag)})),
+            (
+                "tag favourite",
+                "POST",
+                "tag/<int:pk>/favourite",
+                lambda: request({"pk": pick(Tag)}),
+            ),
+            (
+                "tag unfavourite",
+                "DELETE",
+                "tag/<int:pk>/favourite",
+                lambda: request({"pk": pick(Tag)}),
+            ),
+            # feed and metrics
+            ("feed", "GET", "feed", request),
+            ("metrics", "GET", "metrics", request),
+        ]
+
+    def check_coverage(self, scenarios) -> None:
+        """Warn about the api routes no scenario requests."""
+        covered = {route for _, _, route, _ in scenarios}
+        for route in self.api_routes():
+            if route not in covered:
+                self.stderr.write(f"No scenario for {API_PREFIX}{route}")
+
+    def api_routes(self, patterns=None, prefix=""):
+        for pattern in get_resolver().url_patterns if patterns is None else patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                if API_PREFIX.startswith(route) or route.startswith(API_PREFIX):
+                    yield from self.api_routes(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern) and route.startswith(API_PREFIX):
+                yield route.removeprefix(API_PREFIX)
+
+    # measurements
+
+    def run(self, method, route, build, options) -> dict:
+        cache = caches["responses"]
+        latencies = []
+        statuses = Counter()
+        response_bytes = 0
+        for i in range(options["warmup"] + options["requests"]):
+            if i == options["warmup"]:
+                reset_endpoint_stats()
+            kwargs, query, data, user = build()
+            path = re.sub(
+                r"<(?:\w+:)?(\w+)>", lambda match: str(kwargs[match[1]]), route
+            )
+            path = f"/{API_PREFIX}{path}"
+            if user is None:
+                self.client.credentials()
+            else:
+                token = self.token if user == self.user else AccessToken.for_user(user)
+                self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            if not options["warm_cache"]:
+                cache.clear()
+
+            started = perf_counter()
+            response = self.client.generic(
+                method,
+                path,
+                json.dumps(data) if data is not None else "",
+                content_type="application/json",
+                QUERY_STRING=urlencode(query),
+            )
+            body = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            elapsed = perf_counter() - started
+
+            if i >= options["warmup"]:
+                latencies.append(elapsed)
+                statuses[response.status_code] += 1
+                response_bytes += len(body)
+
+        stats = endpoint_stats()
+        queries = sum(row["queries"] for row in stats)
+        db_time = sum(row["db_time"] for row in stats)
+        cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+        requests = len(latencies)
+        return {
+            "method": method,
+            "route": route,
+            "requests": requests,
+            "errors": sum(n for code, n in statuses.items() if code >= 400),
+            "statuses": {str(code): n for code, n in sorted(statuses.items())},
+            "p50_ms": cut_points[49] * 1000,
+            "p95_ms": cut_points[94] * 1000,
+            "p99_ms": cut_points[98] * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "queries": queries / requests,
+            "db_ms": db_time / requests * 1000,
+            "bytes": response_bytes / requests,
+            "requests_per_second": requests / sum(latencies),
+        }
+
+    def report(self, name, result) -> None:
+        line = (
+            f"{name:<34} p50 {result['p50_ms']:8.2f}ms  "
+            f"p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+            f"{result['queries']:5.1f} queries  "
+            f"{result['requests_per_second']:7.1f} req/s"
+        )
+        if result["errors"]:
+            self.stdout.write(
+                self.style.ERROR(f"{line}  statuses {result['statuses']}")
+            )
+        else:
+            self.stdout.write(line)
+
+    def document(self, results, options) -> dict:
+        try:
+            commit = subprocess.run(
+                ("git", "rev-parse", "HEAD"), capture_output=True, text=True
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        return {
+            "created_at": timezone.now().isoformat(),
+            "commit": commit,
+            "options": {
+                name: options[name]
+                for name in ("requests", "warmup", "seed", "warm_cache")
+            },
+            "dataset": self.dataset(),
+            "scenarios": results,
+        }
+
+    def dataset(self) -> dict:
+        return {
+            model._meta.label: model.objects.count()
+            for model in (
+                UserModel,
+                Tag,
+                Idea,
+                Implementation,
+                Discussion,
+                ImplementationComment,
+                DiscussionComment,
+            )
+        }
+
+    def compare(self, baseline, results, threshold) -> None:
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = (result["p95_ms"] / before["p95_ms"] - 1) * 100
+            queries = result["queries"] - before["queries"]
+            line = (
+                f"{name:<34} p95 {before['p95_ms']:8.2f}ms -> "
+                f"{result['p95_ms']:8.2f}ms ({change:+6.1f}%)  "
+                f"queries {before['queries']:5.1f} -> {result['queries']:5.1f}"
+            )
+            if change > threshold or queries > 0.5:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            elif change < -threshold or queries < -0.5:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"Regressions in: {', '.join(regressions)}")
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one WSGI worker (like `gunicorn flaam_api.wsgi`) with one "
+        "ASGI worker running the sync views (`asgi`) and one serving the "
+        "async views from the thread pool (`asgi-pool`), on concurrent "
+        "requests. The ASGI workers run with and without persistent database "
+        "connections, which isolates the connection reuse of the pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="/api/v1/ideas?limit=30")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Requests in flight at once on the ASGI workers.",
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=2.0,
+            help="Milliseconds added to every query, like a database "
+            "reached over the network.",
+        )
+        parser.add_argument("--user", type=int, help="Authenticate as this user id.")
+        parser.add_argument("--handler", choices=("wsgi", "asgi", "asgi-pool"))
+        parser.add_argument(
+            "--conn-max-age",
+            type=int,
+            help="CONN_MAX_AGE of the database connections, defaults to the "
+            "settings when --handler is given, both 0 and 60 otherwise.",
+        )
+
+    def handle(self, *args, **options):
+        if options["handler"] is None:
+            # the views are made async when the url patterns are loaded,
+            # so each handler gets a process of its own
+            self.run_in_subprocess("wsgi", options["conn_max_age"], options)
+            conn_max_ages = (0, 60)
+            if options["conn_max_age"] is not None:
+                conn_max_ages = (options["conn_max_age"],)
+            for conn_max_age in conn_max_ages:
+                for handler in ("asgi", "asgi-pool"):
+                    self.run_in_subprocess(handler, conn_max_age, options)
+            return
+
+        if settings.ASYNC_VIEWS != (options["handler"] == "asgi-pool"):
+            raise CommandError(
+                "Set ASYNC_VIEWS=true for the asgi-pool handler only, "
+                "or leave out --handler."
+            )
+        if options["conn_max_age"] is not None:
+            for alias in connections:
+                connections.settings[alias]["CONN_MAX_AGE"] = options["conn_max_age"]
+        opened = []
+        connection_created.connect(
+            lambda **kwargs: opened.append(1), weak=False, dispatch_uid="opened"
+        )
+        if options["db_latency"]:
+            self.add_db_latency(options["db_latency"] / 1000)
+
+        headers = {"HTTP_HOST": "localhost"}
+        if options["user"] is not None:
+            user = get_user_model().objects.get(pk=options["user"])
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+
+        opened.clear()
+        if options["handler"] == "wsgi":
+            elapsed, statuses = self.run_wsgi(options["path"], headers, options)
+        else:
+            elapsed, statuses = asyncio.run(
+                self.run_asgi(options["path"], headers, options)
+            )
+
+        # failures are reported rather than raised: the ASGI handler leaves
+        # persistent connections of finished requests open, which can run
+        # the database out of connections
+        failed = len(statuses) - statuses.count(200)
+        conn_max_age = connections.settings["default"]["CONN_MAX_AGE"]
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"{options['handler']} (CONN_MAX_AGE={conn_max_age}): "
+                f"{len(statuses)} requests in {elapsed:.2f}s, "
+                f"{len(statuses) / elapsed:.1f} req/s, "
+                f"{len(opened)} connections opened, {failed} failed"
+            )
+        )
+
+    def run_in_subprocess(self, handler, conn_max_age, options):
+        command = [
+            sys.executable,
+            sys.argv[0],
+            "benchmark_asgi",
+            options["path"],
+            f"--handler={handler}",
+            f"--requests={options['requests']}",
+            f"--concurrency={options['concurrency']}",
+            f"--db-latency={options['db_latency']}",
+        ]
+        if options["user"] is not None:
+            command.append(f"--user={options['user']}")
+        if conn_max_age is not None:
+            command.append(f"--conn-max-age={conn_max_age}")
+        async_views = "true" if handler == "asgi-pool" else "false"
+        env = {**os.environ, "ASYNC_VIEWS": async_views}
+        result = subprocess.run(command, env=env)
+        if result.returncode:
+            raise CommandError(f"The {handler} benchmark failed.")
+
+    def add_db_latency(self, seconds):
+        def sleep(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def on_connection_created(connection, **kwargs):
+            if sleep not in connection.execute_wrappers:
+                connection.execute_wrappers.append(sleep)
+
+        self._on_connection_created = on_connection_created
+        connection_created.connect(on_connection_created)
+
+    def run_wsgi(self, url, headers, options):
+        application = get_wsgi_application()
+        path, query = self.split(url)
+        statuses = []
+
+        def start_response(status, response_headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        started = time.perf_counter()
+        for _ in range(options["requests"]):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "wsgi.url_scheme": "http",
+                "wsgi.input": BytesIO(),
+                "wsgi.errors": sys.stderr,
+                **headers,
+            }
+            response = application(environ, start_response)
+            b"".join(response)
+            response.close()
+        return time.perf_counter() - started, statuses
+
+    async def run_asgi(self, url, headers, options):
+        application = get_asgi_application()
+        path, query = self.split(url)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [
+                (name[5:].lower().replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 0),
+        }
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        statuses = []
+
+        async def request():
+            received = False
+
+            async def receive():
+                nonlocal received
+                if received:
+                    # wait for a disconnect that never comes
+                    await asyncio.Future()
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            async with semaphore:
+                await application(dict(scope), receive, send)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(options["requests"])))
+        return time.perf_counter() - started, statuses
+
+    def split(self, url):
+        parts = urlsplit(url)
+        return parts.path, parts.query
@@ -0,0 +1,72 @@
+import timeit
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from flaam_api.utils.parsers import FastJSONParser
+from flaam_api.utils.renderers import FastJSONRenderer
+from ideas.models import Idea, tag_ids_subquery
+from ideas.serializers import IdeaSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the JSON renderers and parsers on an idea list page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size", type=int, default=50, help="Ideas in the payload."
+        )
+        parser.add_argument(
+            "--number", type=int, default=200, help="Runs per measurement."
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Measurements, the best is kept."
+        )
+
+    def handle(self, *args, **options):
+        ideas = Idea.objects.select_related("owner").annotate(
+            tag_ids=tag_ids_subquery()
+        )[: options["page_size"]]
+        request = APIRequestFactory().get("/api/v1/ideas")
+        results = IdeaSerializer(ideas, many=True, context={"request": request}).data
+        if not results:
+            raise CommandError("There are no ideas to render.")
+        data = {"count": len(results), "next": None, "previous": None}
+        data["results"] = results
+
+        rendered = JSONRenderer().render(data)
+        if FastJSONRenderer().render(data) != rendered:
+            raise CommandError("The renderers disagree on the payload.")
+        self.stdout.write(f"{len(results)} ideas, {len(rendered)} bytes")
+
+        self.compare(
+            "render",
+            lambda: JSONRenderer().render(data),
+            lambda: FastJSONRenderer().render(data),
+            options,
+        )
+        self.compare(
+            "parse",
+            lambda: JSONParser().parse(BytesIO(rendered)),
+            lambda: FastJSONParser().parse(BytesIO(rendered)),
+            options,
+        )
+
+    def compare(self, name, stock, fast, options):
+        timings = []
+        for function in (stock, fast):
+            best = min(
+                timeit.repeat(
+                    function, number=options["number"], repeat=options["repeat"]
+                )
+            )
+            timings.append(best / options["number"] * 1e6)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {timings[0]:.1f}µs -> {timings[1]:.1f}µs "
+                f"({timings[0] / timings[1]:.1f}x)"
+            )
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from flaam_api.utils.view_buffer import view_buffer
+
+
+class Command(BaseCommand):
+    help = "Write buffered views to the database."
+
+    def handle(self, *args, **options):
+        flushed = view_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(f"{flushed} views flushed"))
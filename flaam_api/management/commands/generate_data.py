@@ -0,0 +1,626 @@
+import random
+from datetime import datetime, timedelta
+from hashlib import sha1
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from discussions.models import Discussion, DiscussionComment
+from ideas.models import Idea
+from implementations.models import Implementation, ImplementationComment
+from tags.models import Tag
+from votes.models import Vote
+
+UserModel = get_user_model()
+
+# rows at --scale 1
+FULL_SIZE = {
+    "users": 100_000,
+    "tags": 2_000,
+    "ideas": 1_000_000,
+    "implementations": 1_000_000,
+    "discussions": 200_000,
+    "implementation_comments": 1_000_000,
+    "discussion_comments": 1_000_000,
+    "idea_votes": 10_000_000,
+    "implementation_votes": 8_000_000,
+    "discussion_votes": 2_000_000,
+    "idea_views": 10_000_000,
+    "implementation_views": 8_000_000,
+    "discussion_views": 2_000_000,
+    "idea_bookmarks": 1_000_000,
+    "implementation_bookmarks": 1_000_000,
+    "follows": 1_000_000,
+    "favourite_tags": 300_000,
+}
+
+PASSWORD = "Benchmark@1"
+
+WORDS = (
+    "app api bot chat cloud data design game graph health home learn map "
+    "market music news open photo plan quiz robot search share social sport "
+    "stack stream task text tool track travel video vote web wiki work"
+).split()
+
+# COPY text format escapes
+ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def array_literal(values) -> str:
+    elements = ",".join(
+        array_literal(value)
+        if isinstance(value, (list, tuple))
+        else '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        for value in values
+    )
+    return f"{{{elements}}}"
+
+
+def to_copy(value) -> str:
+    """`value` in the COPY text format."""
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    if isinstance(value, str):
+        return value.translate(ESCAPES)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return array_literal(value).translate(ESCAPES)
+    return str(value)
+
+
+class CopyStream:
+    """
+    File-like object reading the `rows` tuples in the COPY text format,
+    each followed by the constant `suffix`, as psycopg2's `copy_expert`
+    asks for them, so rows are never all in memory.
+    """
+
+    def __init__(self, rows, suffix: str = "\n"):
+        self.rows = iter(rows)
+        self.suffix = suffix
+        self.buffer = b""
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        lines = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            line = ("\t".join([to_copy(value) for value in row]) + self.suffix).encode()
+            lines.append(line)
+            length += len(line)
+            self.count += 1
+        data = b"".join(lines)
+        if size < 0:
+            size = len(data)
+        self.buffer = data[size:]
+        return data[:size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a reproducible synthetic dataset, for "
+        "benchmarks, load tests and staging, streamed into the tables with "
+        "COPY. Popularity (owners, tags, votes, views, comments, bookmarks, "
+        "followers) follows a Zipf distribution. Every user's password is "
+        f"'{PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=0.01,
+            help="Fraction of the full size dataset (100k users, 1M ideas and "
+            "implementations, 20M votes and views).",
+        )
+        parser.add_argument(
+            "--rows",
+            action="append",
+            default=[],
+            metavar="NAME=COUNT",
+            help=f"Rows of one kind, over --scale, repeatable. Kinds: "
+            f"{', '.join(FULL_SIZE)}.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Exponent of the popularity, 0 for a uniform distribution.",
+        )
+        parser.add_argument(
+            "--upvote-ratio", type=float, default=0.85, help="Share of upvotes."
+        )
+        parser.add_argument(
+            "--draft-ratio", type=float, default=0.1, help="Share of draft posts."
+        )
+        parser.add_argument(
+            "--span-days",
+            type=int,
+            default=730,
+            help="Posts and comments are spread over this many days to now.",
+        )
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            help="Add to a database that already has users.",
+        )
+
+    def handle(self, *args, **options):
+        if UserModel.objects.exists() and not options["append"]:
+            raise CommandError(
+                "The database already has users, pass --append to add to them."
+            )
+        self.size = {
+            name: max(1, round(rows * options["scale"]))
+            for name, rows in FULL_SIZE.items()
+        }
+        for option in options["rows"]:
+            name, _, count = option.partition("=")
+            if name not in FULL_SIZE or not count.isdigit():
+                raise CommandError(f"Invalid --rows {option}.")
+            self.size[name] = int(count)
+
+        self.rng = random.Random(options["seed"])
+        self.zipf = options["zipf"]
+        self.upvote_ratio = options["upvote_ratio"]
+        self.draft_ratio = options["draft_ratio"]
+        self.span = timedelta(days=options["span_days"])
+        self.now = timezone.now()
+
+        models = (
+            UserModel,
+            Tag,
+            Idea,
+            Implementation,
+            Discussion,
+            ImplementationComment,
+            DiscussionComment,
+        )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # ids are allocated here, keep concurrent inserts out
+                for model in models:
+                    table = connection.ops.quote_name(model._meta.db_table)
+                    cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+            self.generate()
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        self.stdout.write("Updating reputation, hot scores and feeds")
+        call_command("rebuild_reputation", stdout=self.stdout)
+        call_command("refresh_hot", stdout=self.stdout)
+        call_command("backfill_feeds", stdout=self.stdout)
+
+    def generate(self) -> None:
+        users = self.create_users()
+        tags = self.create_tags()
+
+        # counters are written with the rows, so the rows per post come first
+        ideas = self.size["ideas"]
+        votes = self.spread(self.size["idea_votes"], len(users), ideas)
+        views = self.spread(self.size["idea_views"], len(users), ideas)
+        children = {
+            model: self.spread(self.size[f"{model._meta.model_name}s"], None, ideas)
+            for model in (Implementation, Discussion)
+        }
+        upvotes = self.upvotes(votes)
+        ideas, milestones = self.create_ideas(
+            users, tags, votes, upvotes, views, children[Implementation]
+        )
+        self.create_votes(Idea, users, ideas, votes, upvotes)
+        self.create_views(Idea, users, ideas, views)
+
+        posts = {}
+        for model, comment_model in (
+            (Implementation, ImplementationComment),
+            (Discussion, DiscussionComment),
+        ):
+            name = model._meta.model_name
+            count = sum(children[model])
+            votes = self.spread(self.size[f"{name}_votes"], len(users), count)
+            views = self.spread(self.size[f"{name}_views"], len(users), count)
+            comments = self.spread(self.size[f"{name}_comments"], None, count)
+            upvotes = self.upvotes(votes)
+            posts[model] = self.create_posts(
+                model,
+                users,
+                ideas,
+                milestones,
+                children[model],
+                votes,
+                upvotes,
+                views,
+                comments,
+            )
+            self.create_votes(model, users, posts[model], votes, upvotes)
+            self.create_views(model, users, posts[model], views)
+            self.create_comments(comment_model, users, posts[model], comments)
+
+        self.create_user_relations(users, tags, ideas, posts[Implementation])
+
+    # writing
+
+    def copy(self, model, fields, rows, label=None) -> int:
+        """
+        Stream `rows`, tuples of the values of `fields`, into the table of
+        `model` with COPY. The other columns get their field default, and the
+        primary key its sequence when it is not in `fields`.
+        Returns the number of rows.
+        """
+        opts = model._meta
+        columns = [opts.get_field(name).column for name in fields]
+        defaults = [
+            field
+            for field in opts.concrete_fields
+            if field.column not in columns and not field.primary_key
+        ]
+        stream = CopyStream(
+            rows,
+            "".join("\t" + to_copy(field.get_default()) for field in defaults) + "\n",
+        )
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(c) for c in columns + [f.column for f in defaults])
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote(opts.db_table)} ({columns}) FROM STDIN",
+                stream,
+                size=1 << 16,
+            )
+        self.stdout.write(f"{label or opts.verbose_name_plural}: {stream.count}")
+        return stream.count
+
+    def ids(self, model, count: int) -> range:
+        """Primary keys for `count` new rows of `model`."""
+        last = model.objects.order_by("-pk").values_list("pk", flat=True).first()
+        return range((last or 0) + 1, (last or 0) + 1 + count)
+
+    def timestamp(self, index: int, count: int) -> datetime:
+        """Creation time of the `index`th of `count` rows, oldest first."""
+        return self.now - self.span * ((count - index) / count)
+
+    # distributions
+
+    def weights(self, count: int) -> list:
+        """
+        Cumulative Zipf weights of `count` items, in a random order so the
+        popular items are not simply the oldest ones.
+        """
+        weights = [1 / rank ** self.zipf for rank in range(1, count + 1)]
+        self.rng.shuffle(weights)
+        total = 0
+        cumulative = []
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def popular(self, items, cum_weights):
+        return self.rng.choices(items, cum_weights=cum_weights)[0]
+
+    def spread(self, total: int, cap, count: int) -> list:
+        """
+        Split `total` rows over `count` items with Zipf popularity, at most
+        `cap` per item.
+        """
+        if not count:
+            return []
+        cumulative = self.weights(count)
+        norm = total / cumulative[-1]
+        previous = 0
+        counts = []
+        for weight in cumulative:
+            counts.append(min(cap or total, self.round((weight - previous) * norm)))
+            previous = weight
+        return counts
+
+    def round(self, expected: float) -> int:
+        """Rounded up with the probability of the fraction, to keep totals."""
+        return int(expected) + (self.rng.random() < expected % 1)
+
+    def title(self) -> str:
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(2, 6))).title()
+
+    def text(self, words: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=words))
+
+    # rows
+
+    def create_users(self) -> range:
+        password = make_password(PASSWORD)
+        users = self.ids(UserModel, self.size["users"])
+        self.copy(
+            UserModel,
+            (
+                "id",
+                "username",
+                "email",
+                "password",
+                "first_name",
+                "avatar",
+                "status",
+                "description",
+                "date_joined",
+            ),
+            (
+                (
+                    i,
+                    f"user{i}",
+                    f"user{i}@example.com",
+                    password,
+                    self.rng.choice(WORDS).title(),
+                    f"https://avatars.dicebear.com/api/identicon/user{i}.svg",
+                    self.text(3),
+                    self.text(20),
+                    self.timestamp(index, len(users)),
+                )
+                for index, i in enumerate(users)
+            ),
+        )
+        return users
+
+    def create_tags(self) -> range:
+        tags = self.ids(Tag, self.size["tags"])
+        self.copy(
+            Tag,
+            ("id", "name", "description", "created_at", "updated_at"),
+            (
+                (i, f"{self.rng.choice(WORDS)}-{i}", self.text(10), self.now, self.now)
+                for i in tags
+            ),
+        )
+        return tags
+
+    def upvotes(self, votes: list) -> list:
+        return [self.round(count * self.upvote_ratio) for count in votes]
+
+    def create_ideas(self, users, tags, votes, upvotes, views, implementations):
+        """
+        Returns the idea ids, and the number of milestones of each, whose ids
+        are `milestone_id(idea, index)`.
+        """
+        ideas = self.ids(Idea, self.size["ideas"])
+        owners = self.weights(len(users))
+        milestones = bytearray(self.rng.randint(0, 5) for _ in ideas)
+
+        def idea(index, i):
+            created_at = self.timestamp(index, len(ideas))
+            return (
+                i,
+                self.title(),
+                self.popular(users, owners),
+                self.text(30),
+                self.text(200),
+                [[milestone_id(i, m), self.title()] for m in range(milestones[index])],
+                self.rng.random() < self.draft_ratio,
+                upvotes[index],
+                votes[index] - upvotes[index],
+                views[index],
+                implementations[index],
+                created_at,
+                created_at,
+            )
+
+        self.copy(
+            Idea,
+            (
+                "id",
+                "title",
+                "owner_id",
+                "description",
+                "body",
+                "milestones",
+                "draft",
+                "upvote_count",
+                "downvote_count",
+                "view_count",
+                "implementation_count",
+                "created_at",
+                "updated_at",
+            ),
+            (idea(index, i) for index, i in enumerate(ideas)),
+        )
+
+        tag_weights = self.weights(len(tags))
+        self.copy(
+            Idea.tags.through,
+            ("idea_id", "tag_id"),
+            (
+                (i, tag)
+                for i in ideas
+                for tag in sorted(
+                    {
+                        self.popular(tags, tag_weights)
+                        for _ in range(self.rng.randint(1, 5))
+                    }
+                )
+            ),
+            "idea tags",
+        )
+        return ideas, milestones
+
+    def create_posts(
+        self, model, users, ideas, milestones, counts, votes, upvotes, views, comments
+    ) -> range:
+        """Implementations or discussions, `counts[i]` on the `i`th idea."""
+        posts = self.ids(model, sum(counts))
+        owners = self.weights(len(users))
+        is_implementation = model is Implementation
+
+        def rows():
+            index = 0
+            for idea_index, (idea, count) in enumerate(zip(ideas, counts)):
+                for _ in range(count):
+                    created_at = self.timestamp(index, len(posts))
+                    row = (
+                        posts[index],
+                        self.title(),
+                        self.popular(users, owners),
+                        idea,
+                        self.text(200 if is_implementation else 100),
+                        self.rng.random() < self.draft_ratio,
+                        upvotes[index],
+                        votes[index] - upvotes[index],
+                        views[index],
+                        comments[index],
+                        created_at,
+                        created_at,
+                    )
+                    if is_implementation:
+                        row += (
+                            self.text(30),
+                            f"https://github.com/example/{self.rng.choice(WORDS)}",
+                            [
+                                milestone_id(idea, m)
+                                for m in range(milestones[idea_index])
+                                if self.rng.random() < 0.5
+                            ],
+                            self.rng.random() < 0.2,
+                            self.rng.random() < 0.1,
+                        )
+                    yield row
+                    index += 1
+
+        fields = (
+            "id",
+            "title",
+            "owner_id",
+            "idea_id",
+            "body",
+            "draft",
+            "upvote_count",
+            "downvote_count",
+            "view_count",
+            "comments_count",
+            "created_at",
+            "updated_at",
+        )
+        if is_implementation:
+            fields += (
+                "description",
+                "repo_url",
+                "completed_milestones",
+                "is_validated",
+                "is_accepted",
+            )
+        self.copy(model, fields, rows())
+        return posts
+
+    def create_comments(self, model, users, posts, counts) -> None:
+        comments = self.ids(model, sum(counts))
+        owners = self.weights(len(users))
+        post_field = model._meta.get_field(
+            "implementation" if model is ImplementationComment else "discussion"
+        )
+
+        def rows():
+            index = 0
+            for post, count in zip(posts, counts):
+                for _ in range(count):
+                    created_at = self.timestamp(index, len(comments))
+                    yield (
+                        comments[index],
+                        post,
+                        self.popular(users, owners),
+                        self.text(40),
+                        created_at,
+                        created_at,
+                    )
+                    index += 1
+
+        self.copy(
+            model,
+            ("id", post_field.attname, "owner_id", "body", "created_at", "updated_at"),
+            rows(),
+        )
+
+    def create_votes(self, model, users, posts, counts, upvotes) -> None:
+        """The votes counted by the `upvote_count` and `downvote_count` columns."""
+        content_type = ContentType.objects.get_for_model(model).pk
+
+        def rows():
+            for post, count, up in zip(posts, counts, upvotes):
+                for n, user in enumerate(self.rng.sample(users, count)):
+                    value = Vote.UPVOTE if n < up else Vote.DOWNVOTE
+                    yield user, content_type, post, value, self.now, self.now
+
+        self.copy(
+            Vote,
+            (
+                "user_id",
+                "content_type_id",
+                "object_id",
+                "value",
+                "created_at",
+                "updated_at",
+            ),
+            rows(),
+            f"{model._meta.verbose_name} votes",
+        )
+
+    def create_views(self, model, users, posts, counts) -> None:
+        through = model.views.through
+        field = model.views.field
+        self.copy(
+            through,
+            (f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"),
+            (
+                (post, user)
+                for post, count in zip(posts, counts)
+                for user in sorted(self.rng.sample(users, count))
+            ),
+            f"{model._meta.verbose_name} views",
+        )
+
+    def create_user_relations(self, users, tags, ideas, implementations) -> None:
+        """Follows, favourite tags and bookmarks, of popular targets."""
+        for field, targets, size in (
+            (UserModel.following.field, users, "follows"),
+            (UserModel.favourite_tags.field, tags, "favourite_tags"),
+            (UserModel.bookmarked_ideas.field, ideas, "idea_bookmarks"),
+            (
+                UserModel.bookmarked_implementations.field,
+                implementations,
+                "implementation_bookmarks",
+            ),
+        ):
+            counts = self.spread(self.size[size], len(users) - 1, len(targets))
+            self.copy(
+                field.remote_field.through,
+                (
+                    f"{field.m2m_field_name()}_id",
+                    f"{field.m2m_reverse_field_name()}_id",
+                ),
+                (
+                    (user, target)
+                    for target, count in zip(targets, counts)
+                    for user in sorted(
+                        [
+                            user
+                            for user in self.rng.sample(users, count + 1)
+                            # users don't follow themselves
+                            if user != target or targets is not users
+                        ][:count]
+                    )
+                ),
+                size.replace("_", " "),
+            )
+
+
+def milestone_id(idea: int, index: int) -> str:
+    return sha1(f"{idea}:{index}".encode()).hexdigest()[:8]
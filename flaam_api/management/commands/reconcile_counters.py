@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from flaam_api.utils.counters import counter_sources, reconcile
+
+
+class Command(BaseCommand):
+    help = "Repair drift in the stored vote, view and comment counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.ModelName",
+            help="Restrict reconciliation to the given models.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number of drifted rows.",
+        )
+
+    def handle(self, *args, **options):
+        labels = {label.lower() for label in options["models"]}
+        models = [
+            model
+            for model in counter_sources()
+            if not labels or model._meta.label_lower in labels
+        ]
+        for model in models:
+            drifted = reconcile(model, dry_run=options["dry_run"])
+            action = "drifted" if options["dry_run"] else "reconciled"
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.label}: {drifted} rows {action}")
+            )
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from flaam_api.utils.hot import HOT_WEIGHTS, refresh_hot
+
+
+class Command(BaseCommand):
+    help = "Recompute stale hot scores."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.ModelName",
+            help="Restrict the refresh to the given models.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number of stale rows.",
+        )
+
+    def handle(self, *args, **options):
+        labels = {label.lower() for label in options["models"]}
+        models = [
+            apps.get_model(label)
+            for label in HOT_WEIGHTS
+            if not labels or label.lower() in labels
+        ]
+        for model in models:
+            stale = refresh_hot(model, dry_run=options["dry_run"])
+            action = "stale" if options["dry_run"] else "refreshed"
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.label}: {stale} rows {action}")
+            )
@@ -0,0 +1,173 @@
+import logging
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from flaam_api.db.routers import is_pinned, pin_to_primary, pinned, use_replica
+from flaam_api.utils.prometheus import observe_request
+from flaam_api.utils.query_metrics import (
+    QueryBudgetExceeded,
+    RequestMetrics,
+    current_metrics,
+    install_query_recorder,
+    record_request,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_view_class(view_func):
+    return getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+
+
+class ReplicaMiddleware:
+    """
+    Let safe-method requests to the views of `REPLICA_APPS` read from the
+    replicas (see `ReplicaRouter`), unless the requesting user wrote
+    something in the last `REPLICA_PIN_SECONDS`, so users always read their
+    own writes. Pinned requests also skip the cached list pages (see
+    `CachedListMixin`), which may have been rendered from a lagging replica.
+
+    The user is taken from the access token, or the session, without
+    touching the database: authentication only happens in the view.
+    """
+
+    jwt_authentication = JWTAuthentication()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = use_replica.set(False)
+        pinned_token = pinned.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+            pinned.reset(pinned_token)
+
+        user = getattr(request, "user", None)
+        wrote = request.method not in SAFE_METHODS and response.status_code < 400
+        if wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = get_view_class(view_func)
+        app = view_class.__module__.split(".")[0] if view_class is not None else None
+        if request.method in SAFE_METHODS and app in settings.REPLICA_APPS:
+            user_id = self.get_user_id(request)
+            if user_id is not None and is_pinned(user_id):
+                pinned.set(True)
+            else:
+                use_replica.set(True)
+
+    def get_user_id(self, request):
+        header = self.jwt_authentication.get_header(request)
+        raw_token = header and self.jwt_authentication.get_raw_token(header)
+        if raw_token:
+            try:
+                validated = self.jwt_authentication.get_validated_token(raw_token)
+            except (InvalidToken, TokenError):
+                return None
+            return validated.get(jwt_settings.USER_ID_CLAIM)
+        session = getattr(request, "session", None)
+        return session and session.get("_auth_user_id")
+
+
+class QueryMetricsMiddleware:
+    """
+    Record the queries, database time, serializer time, render time and
+    response size of every request by resolved url name (see
+    `endpoint_stats` and the Prometheus metrics), and report them in a
+    `Server-Timing` header when `SERVER_TIMING` is on. Streaming responses
+    are recorded once their content is consumed, with the queries it ran,
+    and have no `Server-Timing` header.
+
+    Views running more queries than their budget are logged, or fail with
+    `QueryBudgetExceeded` when `QUERY_BUDGET_STRICT` is on, as in tests.
+    The budget is the `QUERY_BUDGETS` entry of the url name, else the
+    `query_budget` attribute of the view class, else `DEFAULT_QUERY_BUDGET`,
+    either a number of queries or a mapping of methods to one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_query_recorder()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response, metrics, response.streaming_content
+            )
+            return response
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = ", ".join(
+                (
+                    f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} '
+                    'queries"',
+                    f"serialize;dur={metrics.serialize_time * 1000:.2f}",
+                    f"render;dur={metrics.render_time * 1000:.2f}",
+                    f"total;dur={metrics.total_time * 1000:.2f}",
+                )
+            )
+        self.record(request, response, metrics, len(response.content))
+        return response
+
+    def stream(self, request, response, metrics, content):
+        """
+        Yield the chunks of `content` with `metrics` recording, as the
+        generator runs after this middleware returned, then record the
+        request.
+        """
+        response_bytes = 0
+        chunks = iter(content)
+        while True:
+            token = current_metrics.set(metrics)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                current_metrics.reset(token)
+            response_bytes += len(chunk)
+            yield chunk
+        self.record(request, response, metrics, response_bytes)
+
+    def record(self, request, response, metrics, response_bytes):
+        match = request.resolver_match
+        view_name = match.view_name if match is not None else "<unresolved>"
+        budget = self.get_budget(request, view_name)
+        over_budget = budget is not None and metrics.queries > budget
+        record_request(view_name, request.method, metrics, response_bytes, over_budget)
+        observe_request(view_name, request.method, response.status_code, metrics)
+        if over_budget:
+            message = (
+                f"{request.method} {view_name} ran {metrics.queries} queries, "
+                f"over its budget of {budget}."
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(get_view_class(view_func), "query_budget", None)
+
+    def get_budget(self, request, view_name):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None:
+            budget = getattr(request, "_query_budget", None)
+        if isinstance(budget, dict):
+            budget = budget.get(request.method)
+        return settings.DEFAULT_QUERY_BUDGET if budget is None else budget
@@ -13,8 +13,10 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 from datetime import timedelta
 from os import getenv
 from pathlib import Path
+from urllib.parse import urlparse
 
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,14 +52,18 @@ INSTALLED_APPS = [
     "drf_yasg",
     "django_filters",
     # local
+    "flaam_api",
     "tags",
     "accounts",
     "ideas",
     "discussions",
     "implementations",
+    "votes",
+    "feeds",
 ]
 
 MIDDLEWARE = [
+    "flaam_api.middleware.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -99,6 +105,42 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+# List responses are cached in the `responses` cache, configured by URL:
+# `locmem://`, `file:///path/to/dir` or `redis://host:port/db` for a cache
+# shared by all processes. Without a URL, a process-local cache stands in for
+# the shared one.
+RESPONSE_CACHE_URL = getenv("RESPONSE_CACHE_URL", "locmem://")
+RESPONSE_CACHE_TIMEOUT = int(getenv("RESPONSE_CACHE_TIMEOUT", 60))  # seconds
+
+_response_cache_url = urlparse(RESPONSE_CACHE_URL)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "locmem": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "responses",
+        },
+        "file": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": _response_cache_url.path,
+        },
+        "redis": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": RESPONSE_CACHE_URL,
+        },
+    }[_response_cache_url.scheme],
+}
+
+# The version of the tag catalogue (see tags.catalogue) is kept in this cache,
+# which must be shared between processes for tag changes to reach every worker.
+TAG_CATALOGUE_CACHE = "responses"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -174,6 +216,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "flaam_api": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": True,
+        },
     },
 }
 
@@ -182,21 +229,55 @@ AUTH_USER_MODEL = "accounts.User"
 AUTHENTICATION_BACKENDS = ("accounts.auth.EmailOrUsernameModelBackend",)
 
 REST_FRAMEWORK = {
-    "DEFAULT_PARSER_CLASSES": ("rest_framework.parsers.JSONParser",),
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_PARSER_CLASSES": ("flaam_api.utils.parsers.FastJSONParser",),
+    "DEFAULT_RENDERER_CLASSES": ("flaam_api.utils.renderers.FastJSONRenderer",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
-    "DEFAULT_PAGINATION_CLASS": "flaam_api.utils.paginations.CustomLimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "flaam_api.utils.paginations.CustomPagination",
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "flaam_api.utils.filters.VectorSearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
     "EXCEPTION_HANDLER": "flaam_api.utils.exceptions.exception_handler",
 }
 
+# Ideas and implementations reaching more users than this are not copied to
+# every timeline, they are matched when the feed is read instead.
+FEED_FANOUT_LIMIT = int(getenv("FEED_FANOUT_LIMIT", 5000))
+
+# List counts above this many rows are estimated by the query planner.
+ESTIMATE_COUNT_THRESHOLD = int(getenv("ESTIMATE_COUNT_THRESHOLD", 10_000))
+
+# Run the read heavy views on a thread pool of this size under ASGI, so their
+# persistent database connections are reused between requests, at most this
+# many per worker. On by default in flaam_api.asgi.
+ASYNC_VIEWS = getenv("ASYNC_VIEWS", "false").lower() == "true"
+ASYNC_VIEW_THREADS = int(getenv("ASYNC_VIEW_THREADS", 20))
+
+# Query budgets of the views, see QueryMetricsMiddleware.
+# Views over budget are logged, or fail when QUERY_BUDGET_STRICT is on.
+DEFAULT_QUERY_BUDGET = (
+    int(getenv("DEFAULT_QUERY_BUDGET")) if getenv("DEFAULT_QUERY_BUDGET") else None
+)
+QUERY_BUDGETS = {}  # url name -> queries, or method -> queries, over query_budget
+QUERY_BUDGET_STRICT = getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+
+# Report the database, serializer and render time of every response in a
+# Server-Timing header. Off by default, as it tells clients how long the
+# database takes.
+SERVER_TIMING = getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Prometheus metrics on /metrics. Processes sharing METRICS_DIR, like the
+# gunicorn workers, write their metrics there every METRICS_INTERVAL seconds
+# and report those of all of them. /metrics asks for the METRICS_TOKEN bearer
+# token when it is set, and is only served to staff users otherwise.
+METRICS_DIR = getenv("METRICS_DIR")
+METRICS_INTERVAL = float(getenv("METRICS_INTERVAL", 5))
+METRICS_TOKEN = getenv("METRICS_TOKEN")
+
 # https://django-rest-framework-simplejwt.readthedocs.io/en/latest/settings.html
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
@@ -205,7 +286,7 @@ SIMPLE_JWT = {
     "LEEWAY": timedelta(seconds=60),
 }
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = "flaam_api.utils.mail.EmailBackend"
 EMAIL_HOST = getenv("EMAIL_HOST")
 EMAIL_USE_TLS = True
 EMAIL_PORT = 587
@@ -239,6 +320,18 @@ CORS_ALLOWED_ORIGINS = [
 
 PASSWORD_RESET_TIMEOUT = 10 * 60  # seconds
 
+# Views are buffered and written to the database in bulk.
+# Use `flaam_api.utils.view_buffer.CacheViewBackend` to share the buffer
+# between worker processes, through the `responses` cache, which must then be
+# a redis cache (`RESPONSE_CACHE_URL=redis://...`).
+VIEW_BUFFER = {
+    "BACKEND": getenv(
+        "VIEW_BUFFER_BACKEND", "flaam_api.utils.view_buffer.LocalViewBackend"
+    ),
+    "FLUSH_INTERVAL": int(getenv("VIEW_BUFFER_FLUSH_INTERVAL", 10)),  # seconds
+    "MAX_SIZE": 1000,
+}
+
 if DEBUG:
     REST_FRAMEWORK.update(
         {
@@ -247,11 +340,11 @@ if DEBUG:
                 "rest_framework.authentication.SessionAuthentication",
             ),
             "DEFAULT_RENDERER_CLASSES": (
-                "rest_framework.renderers.JSONRenderer",
+                "flaam_api.utils.renderers.FastJSONRenderer",
                 "rest_framework.renderers.BrowsableAPIRenderer",
             ),
             "DEFAULT_PARSER_CLASSES": (
-                "rest_framework.parsers.JSONParser",
+                "flaam_api.utils.parsers.FastJSONParser",
                 "rest_framework.parsers.FormParser",
                 "rest_framework.parsers.MultiPartParser",
             ),
@@ -275,3 +368,64 @@ if getenv("HEROKU_ENVIRONMENT"):
         traces_sample_rate=1.0,
         send_default_pii=True,
     )
+
+
+# Read replicas, comma separated database urls.
+# Safe-method requests to REPLICA_APPS read from a random replica, unless the
+# user wrote something in the last REPLICA_PIN_SECONDS. Pins are kept in the
+# REPLICA_PIN_CACHE cache, which must be shared between processes to hold
+# across workers, so replicas need a file or redis RESPONSE_CACHE_URL.
+
+DATABASE_REPLICAS = []
+for index, url in enumerate(
+    filter(None, getenv("DATABASE_REPLICA_URLS", "").split(","))
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **dj_database_url.parse(url, conn_max_age=DATABASES["default"]["CONN_MAX_AGE"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+REPLICA_APPS = ("ideas", "implementations", "discussions", "tags", "accounts")
+REPLICA_PIN_SECONDS = int(getenv("REPLICA_PIN_SECONDS", 5))
+REPLICA_PIN_CACHE = "responses"
+
+if DATABASE_REPLICAS:
+    if CACHES[REPLICA_PIN_CACHE]["BACKEND"].endswith(".LocMemCache"):
+        raise ImproperlyConfigured(
+            "DATABASE_REPLICA_URLS needs a RESPONSE_CACHE_URL shared between "
+            "processes (file:// or redis://), to keep users who wrote "
+            "something reading from the primary."
+        )
+    DATABASE_ROUTERS = ["flaam_api.db.routers.ReplicaRouter"]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.contrib.auth.middleware.AuthenticationMiddleware") + 1,
+        "flaam_api.middleware.ReplicaMiddleware",
+    )
+
+
+# Database connection pool, off unless DB_POOL_SIZE is set.
+# Connections go back to the pool at the end of every request, so this many
+# connections per process serve any number of threads.
+
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", 0))
+
+for alias in ("default", *DATABASE_REPLICAS):
+    if not DB_POOL_SIZE or "postgresql" not in DATABASES[alias]["ENGINE"]:
+        continue
+    DATABASES[alias].update(
+        {
+            "ENGINE": "flaam_api.db.pooled_postgresql",
+            "CONN_MAX_AGE": 0,
+            "POOL": {
+                "SIZE": DB_POOL_SIZE,
+                # seconds to wait for a connection before failing the request
+                "TIMEOUT": float(getenv("DB_POOL_TIMEOUT", 10)),
+                # seconds a connection may idle before it is checked on reuse
+                "CHECK_INTERVAL": float(getenv("DB_POOL_CHECK_INTERVAL", 30)),
+                # seconds after which a connection is replaced
+                "MAX_LIFETIME": float(getenv("DB_POOL_MAX_LIFETIME", 3600)),
+            },
+        }
+    )
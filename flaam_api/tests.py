@@ -0,0 +1,121 @@
+import os
+from tempfile import TemporaryDirectory
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from discussions.models import Discussion
+from ideas.models import Idea
+from implementations.models import Implementation
+
+from .utils.hot import HOT_WEIGHTS, refresh_hot
+from .utils.prometheus import (
+    Counter,
+    Gauge,
+    MetricsFiles,
+    Registry,
+    _process_file,
+    _write,
+    mark_process_dead,
+)
+from .utils.query_metrics import QueryBudgetExceeded
+from .utils.testing import TestCase
+
+
+class HotTriggerTests(TestCase):
+    """
+    The `hot` triggers are created by migrations with a copy of the weights
+    of the time. Changing `HOT_WEIGHTS` needs a migration replacing the
+    trigger of the model, or stored scores drift from `refresh_hot`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = get_user_model().objects.create_user(
+            username="hot", email="hot@example.com", password="Hot@1234"
+        )
+        idea = Idea.objects.create(title="Hot", owner=owner)
+        Implementation.objects.create(title="Hot", owner=owner, idea=idea)
+        Discussion.objects.create(title="Hot", owner=owner, idea=idea)
+
+    def test_triggers_use_hot_weights(self):
+        for label, weights in HOT_WEIGHTS.items():
+            model = apps.get_model(label)
+            with self.subTest(model=label):
+                # distinct counts, so any differing weight changes the score
+                model.objects.update(
+                    **{field: 10 ** i for i, field in enumerate(weights, 1)}
+                )
+                self.assertEqual(refresh_hot(model, dry_run=True), 0)
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        UserModel = get_user_model()
+        cls.owner = UserModel.objects.create_user(
+            username="budget", email="budget@example.com", password="Budget@1"
+        )
+        cls.staff = UserModel.objects.create_user(
+            username="staff",
+            email="staff@example.com",
+            password="Budget@1",
+            is_staff=True,
+        )
+        for i in range(3):
+            idea = Idea.objects.create(title=f"Budget {i}", owner=cls.owner)
+            Implementation.objects.create(title="Budget", owner=cls.owner, idea=idea)
+            Discussion.objects.create(title="Budget", owner=cls.owner, idea=idea)
+        cls.idea = idea
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_within_budget(self):
+        for path in (
+            "/api/v1/ideas",
+            f"/api/v1/idea/{self.idea.pk}",
+            "/api/v1/implementations",
+            "/api/v1/discussions",
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={"ideas": 1})
+    def test_over_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "over its budget of 1"):
+            with self.assertLogs("django.request", "ERROR"):
+                self.client.get("/api/v1/ideas")
+
+    @override_settings(QUERY_BUDGETS={"ideas_export": 0})
+    def test_streaming_over_budget(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get("/api/v1/ideas/export")
+        self.assertEqual(response.status_code, 200)
+        # the rows are only read while the content is consumed
+        with self.assertRaisesMessage(QueryBudgetExceeded, "ran 1 queries"):
+            b"".join(response.streaming_content)
+
+
+class MetricsFilesTests(SimpleTestCase):
+    def test_dead_processes_are_merged(self):
+        registry = Registry()
+        requests = registry.register(Counter("requests", "Requests.", ("view",)))
+        busy = registry.register(Gauge("busy", "Busy workers."))
+        with TemporaryDirectory() as path:
+            files = MetricsFiles(registry, path, interval=0)
+            for pid in (1, 2, 3):
+                requests.inc(view="ideas")
+                busy.inc()
+                _write(_process_file(path, pid), registry.collect())
+            for pid in (1, 2):
+                mark_process_dead(path, pid)
+
+            self.assertEqual(sorted(os.listdir(path)), ["3.json", "dead.json"])
+            exposition = registry.render(files.read())
+            # 1 + 2 requests from the dead processes, 3 from the live one
+            self.assertIn('requests{view="ideas"} 6', exposition)
+            self.assertIn("busy 3", exposition)
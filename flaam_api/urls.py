@@ -21,6 +21,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from .views import MetricsView, PrometheusMetricsView
+
 admin.site.site_header = "Flaam"
 admin.site.site_title = "Flaam"
 
@@ -47,12 +49,15 @@ api_v1_urlpatterns = [
     path("", include("implementations.urls"), name="implementations"),
     path("", include("discussions.urls"), name="discussions"),
     path("", include("tags.urls"), name="tags"),
+    path("", include("feeds.urls"), name="feeds"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
 
 
 urlpatterns = [
     path("api/v1/", include(api_v1_urlpatterns), name="api_v1"),
     path("admin/", admin.site.urls),
+    path("metrics", PrometheusMetricsView.as_view(), name="prometheus-metrics"),
     # drf_yasg
     path(
         "swagger",
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix="async-view"
+        )
+    return _executor
+
+
+def async_view(view):
+    """
+    Async variant of the sync `view`, for the ASGI application.
+
+    Django's ASGI handler already runs the sync views of every request on a
+    thread of its own (each request gets its own `ThreadSensitiveContext`),
+    so requests overlap without this. But that thread only lives as long as
+    the request: every request opens a new database connection, and with
+    `CONN_MAX_AGE` the connections of finished requests are left open until
+    they are garbage collected, which can run the database out of
+    connections. This variant runs the whole view, rendering included, on a
+    pool of `ASYNC_VIEW_THREADS` long-lived threads instead, so persistent
+    connections are reused between requests, at most one per thread.
+    Connections past `CONN_MAX_AGE` or in an unusable state are closed
+    around every request, like the request signals do for the main thread.
+    """
+
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    run_in_pool = sync_to_async(run, thread_sensitive=False, executor=get_executor())
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_pool(request, *args, **kwargs)
+
+    return wrapper
+
+
+def as_async_view(view_class, **initkwargs):
+    """
+    `view_class.as_view()`, made async with `async_view` when the
+    `ASYNC_VIEWS` setting is on (the default of the ASGI application).
+    """
+    view = view_class.as_view(**initkwargs)
+    if settings.ASYNC_VIEWS:
+        return async_view(view)
+    return view
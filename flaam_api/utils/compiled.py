@@ -0,0 +1,118 @@
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+from .interactions import (
+    INTERACTION_FIELDS,
+    Interaction,
+    InteractionSerializerMixin,
+    resolve_interactions,
+)
+from .query_metrics import measure_serialize
+
+# fields whose `to_representation` returns the database value unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _passes_through(field) -> bool:
+    if getattr(field, "pk_field", None) is not None:
+        return False
+    to_representation = type(field).to_representation
+    return any(
+        isinstance(field, base) and to_representation is base.to_representation
+        for base in PASSTHROUGH_FIELDS
+    )
+
+
+class CompiledSerializer:
+    """
+    Read-only rendering of a model serializer, generated once from its field
+    declarations into a single function turning a `.values(*lookups)` row
+    into the dict the serializer would have produced.
+
+    Supported fields are the ones reading a chain of model fields or an
+    annotation (named by the field's `annotation` attribute), and the
+    `InteractionSerializerMixin` method fields. Anything else raises
+    `ImproperlyConfigured` when compiling.
+    """
+
+    def __init__(self, serializer_class, field_names=None):
+        serializer = serializer_class()
+        fields = [
+            field
+            for name, field in serializer.fields.items()
+            if not field.write_only and (field_names is None or name in field_names)
+        ]
+        self.model = serializer_class.Meta.model
+        self.interactions = False
+        lookups = ["pk"]
+        converters = {}
+        items = []
+        for field in fields:
+            if field.source == "*":
+                interaction = field.field_name in INTERACTION_FIELDS
+                if not (
+                    isinstance(serializer, InteractionSerializerMixin) and interaction
+                ):
+                    raise ImproperlyConfigured(
+                        f"{serializer_class.__name__}.{field.field_name} "
+                        "can not be compiled."
+                    )
+                self.interactions = True
+                items.append(f"interaction.{field.field_name}")
+                continue
+
+            lookup = getattr(field, "annotation", None) or "__".join(field.source_attrs)
+            if lookup not in lookups:
+                lookups.append(lookup)
+            value = f"row[{lookup!r}]"
+            if _passes_through(field):
+                items.append(value)
+            else:
+                name = f"to_representation_{len(converters)}"
+                converters[name] = field.to_representation
+                items.append(f"(None if (v := {value}) is None else {name}(v))")
+
+        body = ", ".join(
+            f"{field.field_name!r}: {item}" for field, item in zip(fields, items)
+        )
+        source = f"def render_row(row, interaction):\n    return {{{body}}}\n"
+        namespace = dict(converters)
+        exec(
+            compile(source, f"<compiled {serializer_class.__name__}>", "exec"),
+            namespace,
+        )
+        self.render_row = namespace["render_row"]
+        self.lookups = tuple(lookups)
+
+    def render(self, rows, request=None) -> list:
+        """Render `rows` read with `.values(*self.lookups)`."""
+        rows = list(rows)
+        interactions = {}
+        if self.interactions:
+            interactions = resolve_interactions(
+                self.model,
+                getattr(request, "user", None),
+                [row["pk"] for row in rows],
+            )
+        default = Interaction()
+        with measure_serialize():
+            return [
+                self.render_row(row, interactions.get(row["pk"], default))
+                for row in rows
+            ]
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class, field_names=None) -> CompiledSerializer:
+    """
+    The compiled form of `serializer_class`, restricted to the tuple of
+    `field_names` if given. Compiled once per process.
+    """
+    return CompiledSerializer(serializer_class, field_names)
@@ -0,0 +1,129 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .response_cache import bump_generation
+
+
+class CounterFieldsMixin:
+    """
+    Model mixin leaving `counter_fields` out of `save()` on existing rows.
+    They are only written with `increment`, `reconcile` or database
+    triggers, so saving an instance fetched earlier keeps the counts made
+    since.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        updating = not (args or self._state.adding or kwargs.get("force_insert"))
+        if updating and kwargs.get("update_fields") is None:
+            skipped = {*self.counter_fields, *self.get_deferred_fields()}
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+def increment(instance, **deltas: int) -> None:
+    """
+    Atomically add the given deltas to the counter columns of an instance.
+    Counters never go below zero.
+    """
+    updates = {
+        field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta
+    }
+    if updates:
+        type(instance).objects.filter(pk=instance.pk).update(**updates)
+        bump_generation(instance)
+
+
+def count_subquery(queryset, field_name: str):
+    """
+    Count of rows in `queryset` pointing at the outer row through `field_name`.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef("pk")})
+            .order_by()
+            .values(field_name)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def sum_subquery(queryset, field_name: str, column: str):
+    """
+    Sum of `column` over the rows in `queryset` pointing at the outer row
+    through `field_name`.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef("pk")})
+            .order_by()
+            .values(field_name)
+            .annotate(total=Sum(column))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def counter_sources() -> dict:
+    """
+    Map of model -> counter field -> (related queryset, field pointing back).
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from discussions.models import Discussion, DiscussionComment
+    from ideas.models import Idea
+    from implementations.models import Implementation, ImplementationComment
+    from votes.models import Vote
+
+    sources = {
+        Idea: {"implementation_count": (Implementation.objects.all(), "idea")},
+        Implementation: {
+            "comments_count": (ImplementationComment.objects.all(), "implementation")
+        },
+        Discussion: {"comments_count": (DiscussionComment.objects.all(), "discussion")},
+    }
+    for model, counters in sources.items():
+        votes = Vote.objects.filter(
+            content_type=ContentType.objects.get_for_model(model)
+        )
+        counters["upvote_count"] = (votes.filter(value=Vote.UPVOTE), "object_id")
+        counters["downvote_count"] = (votes.filter(value=Vote.DOWNVOTE), "object_id")
+        counters["view_count"] = (
+            model.views.through.objects.all(),
+            model.views.field.m2m_field_name(),
+        )
+    return sources
+
+
+def reconcile(model, pks=None, fields=None, dry_run: bool = False) -> int:
+    """
+    Recompute the counter columns of `model` from the source tables.
+    Only rows whose stored counters drifted are written.
+    Returns the number of drifted rows.
+    """
+    expressions = {
+        field: count_subquery(queryset, field_name)
+        for field, (queryset, field_name) in counter_sources()[model].items()
+        if fields is None or field in fields
+    }
+    drifted = Q()
+    for field, expression in expressions.items():
+        drifted |= ~Q(**{field: expression})
+
+    queryset = model.objects.filter(drifted)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    if dry_run:
+        return queryset.count()
+    drifted = queryset.update(**expressions)
+    if drifted:
+        bump_generation(model)
+    return drifted
@@ -0,0 +1,134 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fieldset(query_params, field_names, fields_param="fields", omit_param="omit"):
+    """
+    Names out of `field_names` selected by the comma separated `fields` and
+    `omit` query parameters, or None when neither is given.
+    """
+    selected = set(field_names)
+    requested = False
+    for param in (fields_param, omit_param):
+        value = query_params.get(param)
+        if not value:
+            continue
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = names - set(field_names)
+        if unknown:
+            raise ValidationError(
+                {param: f"Unknown fields: {', '.join(sorted(unknown))}."}
+            )
+        selected = selected & names if param == fields_param else selected - names
+        requested = True
+    return selected if requested else None
+
+
+def _select_related_paths(select_related, prefix="") -> list:
+    paths = []
+    for name, nested in select_related.items():
+        paths.append(f"{prefix}{name}")
+        paths.extend(_select_related_paths(nested, f"{prefix}{name}__"))
+    return paths
+
+
+def _column_paths(model, source_attrs, annotations):
+    """
+    `only()` paths of the columns read by a field with `source_attrs`, and the
+    relations it traverses. None when the source is not a model field chain.
+    """
+    columns, relations = [], []
+    prefix = ""
+    for index, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if not prefix and attr in annotations:
+                return columns, relations
+            return None
+        if field.many_to_many or field.one_to_many:
+            # loaded by a prefetch or an annotation, not by this row
+            return columns, relations
+        if not field.is_relation or index == len(source_attrs) - 1:
+            columns.append(f"{prefix}{attr}")
+            return columns, relations
+        if field.auto_created and not field.concrete:
+            # reverse one to one
+            return None
+        relations.append(f"{prefix}{attr}")
+        model = field.related_model
+        prefix = f"{prefix}{attr}__"
+    return columns, relations
+
+
+def sparse_queryset(queryset, fields, pk_only_fields=()):
+    """
+    Restrict `queryset` to what the serializer `fields` read: defer the
+    other columns, drop the unused `select_related()` and `prefetch_related()`
+    lookups, and stop selecting the unused annotations (they stay usable for
+    filtering and ordering).
+
+    Method fields read the whole object, so they leave the queryset untouched
+    unless listed in `pk_only_fields`. A field can name the annotation it
+    reads in an `annotation` attribute.
+    """
+    model = queryset.model
+    annotations = queryset.query.annotations
+    columns = {model._meta.pk.name}
+    relations = set()
+    roots = set()
+    used_annotations = set()
+    for name, field in fields.items():
+        if field.source == "*":
+            if name in pk_only_fields:
+                continue
+            return queryset
+        roots.add(field.source_attrs[0])
+        if getattr(field, "annotation", None):
+            used_annotations.add(field.annotation)
+        paths = _column_paths(model, field.source_attrs, annotations)
+        if paths is None:
+            return queryset
+        columns.update(paths[0])
+        relations.update(paths[1])
+    used_annotations.update(roots & set(annotations))
+
+    queryset = queryset.all()
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        kept = [
+            path for path in _select_related_paths(select_related) if path in relations
+        ]
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+    else:
+        kept = []
+    # relations that are not joined are only read through their foreign key
+    columns = {
+        column
+        for column in columns
+        if "__" not in column or column.rsplit("__", 1)[0] in kept
+    }
+    columns.update(
+        relation
+        for relation in relations
+        if "__" not in relation or relation.rsplit("__", 1)[0] in kept
+    )
+
+    lookups = queryset._prefetch_related_lookups
+    if lookups:
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            *(
+                lookup
+                for lookup in lookups
+                if getattr(lookup, "prefetch_to", lookup).split("__")[0] in roots
+            )
+        )
+
+    queryset = queryset.only(*columns)
+    if annotations:
+        queryset.query.set_annotation_mask(
+            name for name in annotations if name in used_annotations
+        )
+    return queryset
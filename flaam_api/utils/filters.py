@@ -0,0 +1,35 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+
+class VectorSearchFilter(SearchFilter):
+    """
+    Search filter that matches against a stored, indexed search vector when
+    the view sets `search_vector_field`, and falls back to `search_fields`
+    otherwise.
+
+    Matching rows are annotated with their `ts_rank` as `rank`, so views can
+    list it in `ordering_fields` to allow `?ordering=-rank`.
+    """
+
+    search_config = "english"
+    rank_annotation = "rank"
+
+    def filter_queryset(self, request, queryset, view):
+        vector_field = getattr(view, "search_vector_field", None)
+        if vector_field is None:
+            return super().filter_queryset(request, queryset, view)
+
+        terms = " ".join(self.get_search_terms(request))
+        if not terms:
+            # cast, as Postgres rejects ordering by a bare constant
+            return queryset.annotate(
+                **{self.rank_annotation: Cast(Value(0.0), FloatField())}
+            )
+
+        query = SearchQuery(terms, config=self.search_config, search_type="websearch")
+        return queryset.filter(**{vector_field: query}).annotate(
+            **{self.rank_annotation: SearchRank(F(vector_field), query)}
+        )
@@ -0,0 +1,63 @@
+from django.db.models import F, FloatField, Func
+from django.db.models.functions import Abs
+
+from .response_cache import bump_generation
+
+# The hot score of a post is computed by the `hot_score` database function,
+# created by the migrations adding the `hot` columns: posts gain one order of
+# magnitude of points in score every 45000 seconds they are younger. The
+# score of a post only changes with its points, so newer posts overtake older
+# ones without rewriting the older rows.
+
+# points per unit of each counter, per model. The triggers keeping `hot` up
+# to date were created with a copy of these weights: a change needs a
+# migration replacing the trigger, checked by flaam_api.tests.
+HOT_WEIGHTS = {
+    "ideas.Idea": {
+        "upvote_count": 1,
+        "downvote_count": -1,
+        "view_count": 0.1,
+        "implementation_count": 2,
+    },
+    "implementations.Implementation": {
+        "upvote_count": 1,
+        "downvote_count": -1,
+        "view_count": 0.1,
+    },
+    "discussions.Discussion": {
+        "upvote_count": 1,
+        "downvote_count": -1,
+        "view_count": 0.1,
+    },
+}
+
+
+class HotScore(Func):
+    function = "hot_score"
+    output_field = FloatField()
+
+
+def hot_expression(model) -> HotScore:
+    """
+    The hot score of each row of `model`, computed from its counters.
+    """
+    weights = HOT_WEIGHTS[model._meta.label]
+    points = sum(F(field) * weight for field, weight in weights.items())
+    return HotScore(points, F("created_at"))
+
+
+def refresh_hot(model, dry_run: bool = False) -> int:
+    """
+    Recompute the stored hot scores of `model`, writing only stale rows.
+    Returns the number of stale rows.
+    """
+    expression = hot_expression(model)
+    queryset = model.objects.alias(error=Abs(F("hot") - expression)).filter(
+        error__gt=1e-9
+    )
+    if dry_run:
+        return queryset.count()
+    stale = queryset.update(hot=expression)
+    if stale:
+        bump_generation(model)
+    return stale
@@ -0,0 +1,153 @@
+from typing import Iterable, NamedTuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Exists, OuterRef, Subquery
+from rest_framework import serializers
+
+from votes.models import Vote
+
+# serializer fields of `InteractionSerializerMixin`, which only read the pk
+INTERACTION_FIELDS = ("bookmarked", "viewed", "vote")
+
+
+class Interaction(NamedTuple):
+    """A user's vote, view and bookmark state on a single object."""
+
+    vote: int = 0
+    viewed: bool = False
+    bookmarked: bool = False
+
+
+def _through_fields(model, relation: str) -> tuple:
+    """
+    Names of the through table fields of the many-to-many `relation` of
+    `model`, pointing at `model` and at the other side respectively.
+    """
+    descriptor = getattr(model, relation)
+    field = descriptor.field
+    if descriptor.reverse:
+        return field.m2m_reverse_field_name(), field.m2m_field_name()
+    return field.m2m_field_name(), field.m2m_reverse_field_name()
+
+
+def _related_pks(model, relation: str, user, pks: Iterable) -> set:
+    """
+    Primary keys out of `pks` that are linked to `user` through the
+    many-to-many `relation` of `model`, read straight from the through table.
+    """
+    own, other = _through_fields(model, relation)
+    return set(
+        getattr(model, relation)
+        .through.objects.filter(**{other: user.pk, f"{own}__in": pks})
+        .values_list(own, flat=True)
+    )
+
+
+def interaction_annotations(model, user) -> dict:
+    """
+    Subqueries for the vote and bookmark state of `user` on each row of
+    `model`, for use in `annotate()`.
+    """
+    if user is None or not user.is_authenticated:
+        return {}
+    annotations = {
+        "vote": Subquery(
+            Vote.objects.filter(
+                user=user,
+                content_type=ContentType.objects.get_for_model(model),
+                object_id=OuterRef("pk"),
+            ).values("value")[:1]
+        )
+    }
+    if hasattr(model, "bookmarked_by"):
+        own, other = _through_fields(model, "bookmarked_by")
+        annotations["bookmarked"] = Exists(
+            model.bookmarked_by.through.objects.filter(
+                **{own: OuterRef("pk"), other: user.pk}
+            )
+        )
+    return annotations
+
+
+def resolve_interactions(model, user, pks: Iterable) -> dict:
+    """
+    Fetch the vote, view and bookmark state of `user` on every object in `pks`
+    using one query per relation.
+    """
+    pks = list(pks)
+    if user is None or not user.is_authenticated or not pks:
+        return {pk: Interaction() for pk in pks}
+
+    votes = dict(
+        Vote.objects.filter(
+            user=user,
+            content_type=ContentType.objects.get_for_model(model),
+            object_id__in=pks,
+        ).values_list("object_id", "value")
+    )
+    viewed = _related_pks(model, "views", user, pks)
+    bookmarked = (
+        _related_pks(model, "bookmarked_by", user, pks)
+        if hasattr(model, "bookmarked_by")
+        else set()
+    )
+
+    return {
+        pk: Interaction(
+            vote=votes.get(pk, 0),
+            viewed=pk in viewed,
+            bookmarked=pk in bookmarked,
+        )
+        for pk in pks
+    }
+
+
+class InteractionListSerializer(serializers.ListSerializer):
+    """
+    Resolves the requesting user's interactions for a whole page at once.
+    """
+
+    interactions = None
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        objects = list(iterable)
+        if not set(INTERACTION_FIELDS) & set(self.child.fields):
+            return super().to_representation(objects)
+        request = self.context.get("request")
+        self.interactions = resolve_interactions(
+            self.child.Meta.model,
+            getattr(request, "user", None),
+            [obj.pk for obj in objects],
+        )
+        return super().to_representation(objects)
+
+
+class InteractionSerializerMixin:
+    """
+    Provides `bookmarked`, `viewed` and `vote` method fields backed by
+    `resolve_interactions`.
+    Pair with `list_serializer_class = InteractionListSerializer` in Meta.
+    """
+
+    def get_interaction(self, obj) -> Interaction:
+        interactions = getattr(self.parent, "interactions", None)
+        if interactions is None or obj.pk not in interactions:
+            interactions = getattr(self, "_interactions", {})
+            if obj.pk not in interactions:
+                request = self.context.get("request")
+                interactions = resolve_interactions(
+                    type(obj), getattr(request, "user", None), [obj.pk]
+                )
+                self._interactions = interactions
+        return interactions[obj.pk]
+
+    def get_bookmarked(self, obj) -> bool:
+        return self.get_interaction(obj).bookmarked
+
+    def get_viewed(self, obj) -> bool:
+        return self.get_interaction(obj).viewed
+
+    def get_vote(self, obj) -> int:
+        return self.get_interaction(obj).vote
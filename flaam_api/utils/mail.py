@@ -0,0 +1,25 @@
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+
+from .prometheus import emails_sending, emails_sent
+
+
+class EmailBackend(SMTPEmailBackend):
+    """
+    SMTP backend counting the emails sent and failed, and the emails being
+    sent: they are sent within the requests, so these are the emails waiting
+    on the mail server.
+    """
+
+    def send_messages(self, email_messages):
+        count = len(email_messages)
+        emails_sending.inc(count)
+        try:
+            sent = super().send_messages(email_messages)
+        except Exception:
+            emails_sent.inc(count, result="failed")
+            raise
+        finally:
+            emails_sending.dec(count)
+        emails_sent.inc(sent, result="sent")
+        emails_sent.inc(count - sent, result="failed")
+        return sent
@@ -0,0 +1,297 @@
+from hashlib import sha1
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from flaam_api.db.routers import pinned
+
+from . import response_cache
+from .compiled import compile_serializer
+from .fieldsets import parse_fieldset, sparse_queryset
+from .interactions import (
+    INTERACTION_FIELDS,
+    InteractionSerializerMixin,
+    interaction_annotations,
+    resolve_interactions,
+)
+from .renderers import FastJSONRenderer
+
+
+class CachedListMixin:
+    """
+    Cache the list responses of a view, keyed by the normalized query string
+    and the generation of every model in `cache_models`.
+
+    Saving, deleting, voting on or counting anything of those models bumps
+    its generation, which retires every cached page depending on it. The
+    save and delete signals are only connected for the models of such views.
+    The requesting user's vote, view and bookmark state is never served from
+    the cache, it is resolved for the page on every request.
+
+    With read replicas, a page rendered from a lagging replica can be cached
+    under the generation of a write it does not show yet. Users pinned to the
+    primary after a write (see `ReplicaMiddleware`) therefore never read the
+    cache. Their pages are rendered from the primary and replace the cached
+    ones.
+    """
+
+    # model labels the rendered list depends on, defaults to the queryset model
+    cache_models = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_models is None:
+            if getattr(cls, "queryset", None) is None:
+                raise ImproperlyConfigured(
+                    f"{cls.__name__} has no queryset, set its cache_models."
+                )
+            cls.cache_models = (cls.queryset.model._meta.label,)
+        response_cache.watch_models(cls.cache_models)
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache.list_cache_key(request, self.cache_models)
+        data = None if pinned.get() else response_cache.get_response(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code == 200:
+                response_cache.set_response(key, response.data)
+            return response
+
+        self.apply_interactions(data)
+        return Response(data)
+
+    def apply_interactions(self, data) -> None:
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, InteractionSerializerMixin):
+            return
+        rows = data["results"] if isinstance(data, dict) else data
+        if not rows or not set(INTERACTION_FIELDS) & set(rows[0]):
+            return
+        interactions = resolve_interactions(
+            serializer_class.Meta.model,
+            self.request.user,
+            [row["id"] for row in rows],
+        )
+        for row in rows:
+            interaction = interactions[row["id"]]
+            for field in INTERACTION_FIELDS:
+                if field in row:
+                    row[field] = getattr(interaction, field)
+
+
+class CompiledListMixin:
+    """
+    Render list pages with the compiled form of the serializer (see
+    `CompiledSerializer`), straight from `.values()` rows instead of model
+    instances. Creating and the detail views keep the normal serializer.
+    """
+
+    def get_compiled_serializer(self):
+        return compile_serializer(
+            self.get_serializer_class(), tuple(self.get_serializer().fields)
+        )
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*compiled.lookups)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.render(page, request))
+        return Response(compiled.render(queryset, request))
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for detail views.
+
+    The ETag is derived from `etag_fields` (`updated_at` and the counters)
+    and the requesting user's vote and bookmark, all read in a single query
+    on the primary key. No `Last-Modified` is sent: votes, views and the
+    user's own state change without touching `updated_at`, so only the ETag
+    covers everything the body depends on.
+    Call `get_not_modified_response()` first thing in `get`, and return its
+    response when there is one.
+    """
+
+    etag_fields = ("updated_at",)
+    cache_control = "private, no-cache"
+
+    def get_etag_parts(self, row: dict) -> list:
+        return [row[key] for key in sorted(row)]
+
+    def get_etag(self):
+        """
+        ETag of the requested object, or None if it does not exist.
+        """
+        model = self.get_queryset().model
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        annotations = {}
+        if issubclass(self.get_serializer_class(), InteractionSerializerMixin):
+            annotations = interaction_annotations(model, self.request.user)
+        row = (
+            model.objects.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .annotate(**annotations)
+            .values(*self.etag_fields, *annotations)
+            .first()
+        )
+        if row is None:
+            return None
+        parts = "|".join(str(part) for part in self.get_etag_parts(row))
+        return quote_etag(sha1(parts.encode()).hexdigest())
+
+    def get_not_modified_response(self, request):
+        self.etag = self.get_etag()
+        if self.etag is None:
+            return None
+        return get_conditional_response(request, etag=self.etag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "etag", None)
+        cacheable = response.status_code in (200, 304)
+        if request.method == "GET" and etag and cacheable:
+            response["ETag"] = etag
+            response["Cache-Control"] = self.cache_control
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` and `?omit=c` on GET requests: the serializer is trimmed
+    to the selected fields, and the queryset only loads the columns, joins,
+    prefetches and annotations they read (see `sparse_queryset`).
+
+    The pk is rendered whenever the requesting user's interactions are, as
+    cached pages resolve them by pk (see `CachedListMixin`), and removed from
+    the response when it was not selected.
+    """
+
+    fields_param = "fields"
+    omit_param = "omit"
+
+    def is_sparse(self) -> bool:
+        params = self.request.query_params
+        sparse = params.get(self.fields_param) or params.get(self.omit_param)
+        return self.request.method == "GET" and bool(sparse)
+
+    def get_fieldset(self, field_names):
+        if self.request.method != "GET":
+            return None
+        return parse_fieldset(
+            self.request.query_params, field_names, self.fields_param, self.omit_param
+        )
+
+    def get_hidden_fields(self, serializer, fieldset) -> set:
+        """Fields rendered for `fieldset` but removed from the response."""
+        child = getattr(serializer, "child", serializer)
+        interactions = fieldset & set(INTERACTION_FIELDS)
+        if isinstance(child, InteractionSerializerMixin) and interactions:
+            return {"id"} - fieldset
+        return set()
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = getattr(serializer, "child", serializer).fields
+        fieldset = self.get_fieldset(fields)
+        if fieldset is not None:
+            self.hidden_fields = self.get_hidden_fields(serializer, fieldset)
+            fieldset = fieldset | self.hidden_fields
+            for name in [name for name in fields if name not in fieldset]:
+                del fields[name]
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.is_sparse():
+            return queryset
+        serializer = self.get_serializer()
+        pk_only_fields = ()
+        if isinstance(serializer, InteractionSerializerMixin):
+            pk_only_fields = INTERACTION_FIELDS
+        return sparse_queryset(queryset, serializer.fields, pk_only_fields)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        data = getattr(response, "data", None)
+        if response.status_code != 200 or not data or not self.is_sparse():
+            return response
+        if not hasattr(self, "hidden_fields"):
+            # served from the cache, without a serializer
+            self.get_serializer()
+        if self.hidden_fields:
+            rows = data.get("results", [data]) if isinstance(data, dict) else data
+            for row in rows:
+                for name in self.hidden_fields:
+                    row.pop(name, None)
+        return response
+
+
+class NDJSONExportMixin:
+    """
+    Stream every row of the queryset as newline delimited JSON, in primary
+    key order, rendered by the compiled serializer without the requesting
+    user's interactions.
+
+    Rows are read through a server-side cursor `export_chunk_size` at a time
+    and written out chunk by chunk, so memory use does not grow with the
+    table. `?updated_since=<ISO 8601 datetime>` limits the export to the rows
+    updated since then.
+    """
+
+    export_chunk_size = 2000
+    updated_since_param = "updated_since"
+
+    def get_updated_since(self):
+        value = self.request.query_params.get(self.updated_since_param)
+        if not value:
+            return None
+        updated_since = parse_datetime(value)
+        if updated_since is None:
+            raise ValidationError(
+                {self.updated_since_param: "A valid ISO 8601 datetime is required."}
+            )
+        if timezone.is_naive(updated_since):
+            updated_since = timezone.make_aware(updated_since)
+        return updated_since
+
+    def export(self, request):
+        serializer_class = self.get_serializer_class()
+        compiled = compile_serializer(
+            serializer_class,
+            tuple(
+                name
+                for name in serializer_class().fields
+                if name not in INTERACTION_FIELDS
+            ),
+        )
+        queryset = self.get_queryset()
+        updated_since = self.get_updated_since()
+        if updated_since is not None:
+            queryset = queryset.filter(updated_at__gte=updated_since)
+        rows = (
+            queryset.order_by("pk")
+            .values(*compiled.lookups)
+            .iterator(chunk_size=self.export_chunk_size)
+        )
+        return StreamingHttpResponse(
+            self.stream(rows, compiled), content_type="application/x-ndjson"
+        )
+
+    def stream(self, rows, compiled):
+        renderer = FastJSONRenderer()
+        while True:
+            chunk = list(islice(rows, self.export_chunk_size))
+            if not chunk:
+                return
+            yield b"".join(
+                renderer.render(row) + b"\n" for row in compiled.render(chunk)
+            )
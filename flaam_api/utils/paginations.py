@@ -1,10 +1,349 @@
-from rest_framework.pagination import LimitOffsetPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+import coreapi
+import coreschema
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, OrderBy, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which seeking on datetimes needs."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """
+    The planner's row estimate for `queryset`, read from `pg_class.reltuples`
+    for unfiltered querysets and from EXPLAIN otherwise.
+    Returns None when no estimate is available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    query = queryset.order_by().query
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct and not query.combinator:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                (queryset.model._meta.db_table,),
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 until the table is first analyzed
+            return row[0] if row and row[0] >= 0 else None
+
+        sql, params = query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class CustomLimitOffsetPagination(LimitOffsetPagination):
     """
     A custom pagination class
+
+    Counts larger than `estimate_count_threshold` are replaced by the
+    planner's estimate, unless the client asks for `count=exact`.
+    `count_exact` in the response tells which one was returned.
     """
 
     default_limit = 10
     max_limit = 30
+    count_query_param = "count"
+    estimate_count_threshold = getattr(settings, "ESTIMATE_COUNT_THRESHOLD", 0)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_exact = True
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        exact = self.request.query_params.get(self.count_query_param) == "exact"
+        if self.estimate_count_threshold and not exact:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > self.estimate_count_threshold:
+                self.count_exact = False
+                return estimate
+        return super().get_count(queryset)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("count_exact", self.count_exact),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_exact"] = {"type": "boolean"}
+        return response_schema
+
+    def get_schema_fields(self, view):
+        return [
+            *super().get_schema_fields(view),
+            coreapi.Field(
+                name=self.count_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.Enum(
+                    ("estimate", "exact"),
+                    title="Count",
+                    description="Pass `exact` to never estimate the total count.",
+                ),
+            ),
+        ]
+
+
+class CustomKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination.
+
+    Seeks past the last row of the previous page on the active ordering plus
+    the primary key instead of using OFFSET, and never counts the queryset,
+    so every page costs the same regardless of depth.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = CustomLimitOffsetPagination.default_limit
+    max_limit = CustomLimitOffsetPagination.max_limit
+    default_ordering = ("-created_at",)
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.get_ordering(queryset)
+        keys = {
+            f"_keyset_{i}": expression for i, (expression, _) in enumerate(ordering)
+        }
+        queryset = queryset.annotate(**keys)
+        if position is not None:
+            if len(position) != len(keys):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self.seek(ordering, position, reverse))
+        queryset = queryset.order_by(
+            *(
+                F(key).desc() if descending != reverse else F(key).asc()
+                for key, (_, descending) in zip(keys, ordering)
+            )
+        )
+
+        results = list(queryset[: self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[: self.limit]
+        if reverse:
+            results.reverse()
+
+        first = self.get_position(results[0], keys) if results else None
+        last = self.get_position(results[-1], keys) if results else None
+        if reverse:
+            self.previous_position = first if has_more else None
+            self.next_position = last if results else None
+        else:
+            self.previous_position = first if position is not None else None
+            self.next_position = last if has_more else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get_position(self, row, keys) -> list:
+        # rows are model instances, or dicts when paginating `.values()`
+        if isinstance(row, dict):
+            return [row[key] for key in keys]
+        return [getattr(row, key) for key in keys]
+
+    def get_ordering(self, queryset) -> list:
+        """
+        The active ordering as (expression, descending) pairs,
+        ending with the primary key as a tie breaker.
+        """
+        ordering = list(queryset.query.order_by) or self.get_default_ordering(
+            queryset.model
+        )
+        pairs = []
+        for field in ordering:
+            if isinstance(field, OrderBy):
+                pairs.append((field.expression, field.descending))
+            else:
+                descending = field.startswith("-")
+                name = field.lstrip("-")
+                pairs.append((F("pk" if name == "id" else name), descending))
+        if not any(getattr(e, "name", None) == "pk" for e, _ in pairs):
+            pairs.append((F("pk"), pairs[0][1] if pairs else True))
+        return pairs
+
+    def get_default_ordering(self, model) -> list:
+        """`default_ordering`, or newest first by pk for models without it."""
+        try:
+            for field in self.default_ordering:
+                model._meta.get_field(field.lstrip("-"))
+        except FieldDoesNotExist:
+            return ["-pk"]
+        return list(self.default_ordering)
+
+    def seek(self, ordering, position, reverse: bool) -> Q:
+        """
+        Rows strictly after `position` in lexicographic order:
+        k0 > v0 OR (k0 = v0 AND k1 > v1) OR ...
+        """
+        condition = Q()
+        equal = {}
+        for i, ((_, descending), value) in enumerate(zip(ordering, position)):
+            key = f"_keyset_{i}"
+            lookup = "lt" if descending != reverse else "gt"
+            condition |= Q(**equal, **{f"{key}__{lookup}": value})
+            equal[key] = value
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            return list(cursor["p"]), bool(cursor.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse: bool) -> str:
+        cursor = {"p": position}
+        if reverse:
+            cursor["r"] = 1
+        encoded = json.dumps(cursor, cls=CursorEncoder, separators=(",", ":"))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            urlsafe_b64encode(encoded.encode("utf-8")).decode("ascii"),
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.String(
+                    title="Cursor",
+                    description="The pagination cursor value.",
+                ),
+            ),
+            coreapi.Field(
+                name=self.limit_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.Integer(
+                    title="Limit",
+                    description="Number of results to return per page.",
+                ),
+            ),
+        ]
+
+
+class CustomPagination(CustomLimitOffsetPagination):
+    """
+    Limit/offset pagination that switches to keyset pagination when the
+    request passes `cursor` (or `pagination=cursor`), or when the view sets
+    `pagination_mode = "cursor"`.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = CustomKeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request, view):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def use_keyset(self, request, view) -> bool:
+        if getattr(view, "pagination_mode", None) == "cursor":
+            return True
+        params = request.query_params
+        if params.get(self.mode_query_param) == "cursor":
+            return True
+        return self.keyset_class.cursor_query_param in params
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_fields(self, view):
+        return [
+            *super().get_schema_fields(view),
+            coreapi.Field(
+                name=self.mode_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.Enum(
+                    ("offset", "cursor"),
+                    title="Pagination",
+                    description="Pagination mode, `cursor` skips the total count.",
+                ),
+            ),
+            self.keyset_class().get_schema_fields(view)[0],
+        ]
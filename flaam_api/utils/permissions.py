@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 
 
@@ -14,3 +16,18 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 
         # Write permissions are only allowed to the owner of the snippet.
         return obj.owner == request.user
+
+
+class HasMetricsToken(permissions.BasePermission):
+    """
+    Allow requests bearing the `METRICS_TOKEN` token, or staff users when it
+    is not set.
+    """
+
+    def has_permission(self, request, view):
+        if not settings.METRICS_TOKEN:
+            return bool(request.user and request.user.is_staff)
+        return constant_time_compare(
+            request.META.get("HTTP_AUTHORIZATION", ""),
+            f"Bearer {settings.METRICS_TOKEN}",
+        )
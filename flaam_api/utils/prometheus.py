@@ -0,0 +1,461 @@
+import atexit
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from math import inf
+
+from django.conf import settings
+
+from flaam_api.db.pool import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the request duration buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1,
+    2.5,
+    5,
+    7.5,
+    10,
+)
+
+
+def format_value(value) -> str:
+    if value == inf:
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def format_sample(name: str, labels: dict, value) -> str:
+    if not labels:
+        return f"{name} {format_value(value)}"
+    pairs = ",".join(
+        '{}="{}"'.format(
+            label,
+            str(label_value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for label, label_value in labels.items()
+    )
+    return f"{name}{{{pairs}}} {format_value(value)}"
+
+
+class Metric:
+    """Samples of one metric by label values, in the Prometheus data model."""
+
+    type = None
+    # gauges are dropped with their process, other metrics are kept
+    live = False
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _add(self, amount, labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> list:
+        """`[label values, value]` pairs, as written to the metrics files."""
+        with self._lock:
+            return [
+                [list(key), list(value) if isinstance(value, list) else value]
+                for key, value in self._values.items()
+            ]
+
+    def lines(self, values: dict) -> list:
+        """Text format of `values`, label values -> value."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for key, value in sorted(values.items()):
+            lines.append(
+                format_sample(self.name, dict(zip(self.labelnames, key)), value)
+            )
+        return lines
+
+
+class Counter(Metric):
+    """
+    Monotonic total. `set` is for totals kept elsewhere, like the counters
+    of the connection pools, copied by a collector.
+    """
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels) -> None:
+        self._add(amount, labels)
+
+
+class Gauge(Metric):
+    type = "gauge"
+    live = True
+
+    def inc(self, amount=1, **labels) -> None:
+        self._add(amount, labels)
+
+    def dec(self, amount=1, **labels) -> None:
+        self._add(-amount, labels)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in `buckets`, stored as the count of
+    each bucket, not cumulative, the `+Inf` bucket, then the sum.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets) + (inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def lines(self, values: dict) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for key, counts in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                lines.append(
+                    format_sample(
+                        f"{self.name}_bucket",
+                        {**labels, "le": format_value(bound)},
+                        total,
+                    )
+                )
+            lines.append(format_sample(f"{self.name}_sum", labels, counts[-1]))
+            lines.append(format_sample(f"{self.name}_count", labels, total))
+        return lines
+
+
+class Registry:
+    """
+    The metrics of the app. Collectors are called before every collection,
+    to copy the state kept elsewhere into metrics.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> dict:
+        """
+        Samples of this process by metric name, under `"live"` for gauges
+        and `"totals"` for the others.
+        """
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Failed to collect metrics")
+        collected = {"live": {}, "totals": {}}
+        for name, metric in self.metrics.items():
+            collected["live" if metric.live else "totals"][name] = metric.samples()
+        return collected
+
+    def render(self, processes) -> str:
+        """Text exposition format of the samples of `processes` added up."""
+        merged = merge_samples(processes)
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(metric.lines(merged.get(name, {})))
+        return "\n".join(lines) + "\n"
+
+
+def merge_samples(processes) -> dict:
+    """Samples of `processes` added up, by metric name and label values."""
+    merged = {}
+    for process in processes:
+        for section in (process.get("live", {}), process.get("totals", {})):
+            for name, samples in section.items():
+                values = merged.setdefault(name, {})
+                for key, value in samples:
+                    key = tuple(key)
+                    if isinstance(value, list):
+                        current = values.get(key, [0] * len(value))
+                        values[key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        values[key] = values.get(key, 0) + value
+    return merged
+
+
+# totals of the exited processes, see `mark_process_dead`
+DEAD_PROCESSES_FILE = "dead.json"
+
+
+def _process_file(path: str, pid: int) -> str:
+    return os.path.join(path, f"{pid}.json")
+
+
+def _read(filename: str) -> dict:
+    with open(filename) as file:
+        return json.load(file)
+
+
+def _write(filename: str, collected: dict) -> None:
+    temporary = f"{filename}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(collected, file)
+    os.replace(temporary, filename)
+
+
+def mark_process_dead(path: str, pid: int) -> None:
+    """
+    Add the totals of the exited process `pid` to those of the processes
+    that exited before it, kept in one file of `path`, and remove its own
+    file, dropping its gauges. So recycled workers (`--max-requests`) do not
+    pile up files. Called by gunicorn's master process when a worker exits,
+    see gunicorn.conf.py.
+    """
+    filename = _process_file(path, pid)
+    dead_filename = os.path.join(path, DEAD_PROCESSES_FILE)
+    try:
+        collected = _read(filename)
+    except (OSError, ValueError):
+        return
+    try:
+        dead = _read(dead_filename)
+    except (OSError, ValueError):
+        dead = {}
+    merged = merge_samples([dead, {"totals": collected["totals"]}])
+    dead = {
+        "live": {},
+        "totals": {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in merged.items()
+        },
+    }
+    # readers skip the file of `pid` while both are there
+    _write(dead_filename, {**dead, "merged": [pid]})
+    os.remove(filename)
+    _write(dead_filename, dead)
+
+
+def clear(path: str) -> None:
+    """Start the metrics in `path` from zero."""
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(path, name))
+
+
+class MetricsFiles:
+    """
+    Shares the metrics of the processes serving the app, like gunicorn's
+    workers, through the directory `path`: each process writes its samples
+    to its own file every `interval` seconds and on exit, and a scrape of any
+    process adds up the files of all of them. The totals of the exited
+    processes are kept in a single file (see `mark_process_dead`).
+    """
+
+    def __init__(self, registry: Registry, path: str, interval: float = 5):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._timer_lock = threading.Lock()
+        self._timer_pid = None
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, live: bool = True) -> None:
+        collected = self.registry.collect()
+        if not live:
+            collected["live"] = {}
+        _write(_process_file(self.path, os.getpid()), collected)
+
+    def read(self) -> list:
+        processes = {}
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            try:
+                processes[name] = _read(os.path.join(self.path, name))
+            except (OSError, ValueError):
+                logger.exception("Failed to read metrics file %s", name)
+        dead = processes.get(DEAD_PROCESSES_FILE, {})
+        for pid in dead.pop("merged", ()):
+            processes.pop(f"{pid}.json", None)
+        return list(processes.values())
+
+    def ensure_timer(self) -> None:
+        # the timer thread does not survive a fork, so track the owning process
+        if not self.interval or self._timer_pid == os.getpid():
+            return
+        with self._timer_lock:
+            if self._timer_pid != os.getpid():
+                self._timer_pid = os.getpid()
+                threading.Thread(target=self._run_timer, daemon=True).start()
+
+    def _run_timer(self) -> None:
+        event = threading.Event()
+        while not event.wait(self.interval):
+            try:
+                self.write()
+            except Exception:
+                logger.exception("Failed to write metrics")
+
+
+registry = Registry()
+
+request_duration = registry.register(
+    Histogram(
+        "flaam_http_request_duration_seconds",
+        "Time to serve requests, by url name, method and status.",
+        ("view", "method", "status"),
+    )
+)
+db_queries = registry.register(
+    Counter(
+        "flaam_db_queries_total",
+        "Database queries run by requests, by url name.",
+        ("view",),
+    )
+)
+db_query_seconds = registry.register(
+    Counter(
+        "flaam_db_query_seconds_total",
+        "Time spent in database queries by requests, by url name.",
+        ("view",),
+    )
+)
+cache_requests = registry.register(
+    Counter(
+        "flaam_cache_requests_total",
+        "Lookups in a cache, by cache and result (hit or miss).",
+        ("cache", "result"),
+    )
+)
+emails_sent = registry.register(
+    Counter(
+        "flaam_emails_total",
+        "Emails handed to the mail server, by result (sent or failed).",
+        ("result",),
+    )
+)
+emails_sending = registry.register(
+    Gauge(
+        "flaam_emails_sending",
+        "Emails waiting on the mail server, sent within requests.",
+    )
+)
+pool_connections = registry.register(
+    Gauge(
+        "flaam_db_pool_connections",
+        "Open connections of the pools, by database and state (in_use or idle).",
+        ("database", "state"),
+    )
+)
+pool_size = registry.register(
+    Gauge("flaam_db_pool_size", "Maximum open connections of the pools.", ("database",))
+)
+pool_counters = {
+    stat: registry.register(Counter(name, documentation, ("database",)))
+    for stat, name, documentation in (
+        ("checkouts", "flaam_db_pool_checkouts_total", "Connections handed out."),
+        (
+            "timeouts",
+            "flaam_db_pool_timeouts_total",
+            "Waits for a connection that timed out.",
+        ),
+        ("created", "flaam_db_pool_connects_total", "Connections opened."),
+        ("discarded", "flaam_db_pool_discards_total", "Connections closed."),
+        (
+            "failed_checks",
+            "flaam_db_pool_failed_checks_total",
+            "Idle connections found broken.",
+        ),
+        (
+            "wait_seconds_total",
+            "flaam_db_pool_wait_seconds_total",
+            "Time spent waiting for a connection.",
+        ),
+    )
+}
+
+
+def collect_pools() -> None:
+    for alias, stats in pool_stats().items():
+        pool_size.set(stats["size"], database=alias)
+        pool_connections.set(stats["in_use"], database=alias, state="in_use")
+        pool_connections.set(stats["idle"], database=alias, state="idle")
+        for stat, counter in pool_counters.items():
+            counter.set(stats[stat], database=alias)
+
+
+registry.collectors.append(collect_pools)
+
+
+@lru_cache(maxsize=None)
+def get_metrics_files():
+    """The `MetricsFiles` of `METRICS_DIR`, None without it."""
+    if not settings.METRICS_DIR:
+        return None
+    files = MetricsFiles(registry, settings.METRICS_DIR, settings.METRICS_INTERVAL)
+    atexit.register(files.write, live=False)
+    return files
+
+
+def observe_request(view_name, method, status, metrics) -> None:
+    """Record a request served, with its `RequestMetrics`."""
+    request_duration.observe(
+        metrics.total_time, view=view_name, method=method, status=status
+    )
+    db_queries.inc(metrics.queries, view=view_name)
+    db_query_seconds.inc(metrics.db_time, view=view_name)
+    files = get_metrics_files()
+    if files is not None:
+        files.ensure_timer()
+
+
+def exposition() -> str:
+    """The metrics of every process sharing `METRICS_DIR`, or of this one."""
+    files = get_metrics_files()
+    if files is None:
+        return registry.render([registry.collect()])
+    files.write()
+    return registry.render(files.read())
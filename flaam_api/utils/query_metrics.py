@@ -0,0 +1,179 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# metrics of the request being served, see QueryMetricsMiddleware
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its budget, with `QUERY_BUDGET_STRICT`."""
+
+
+class RequestMetrics:
+    """
+    Queries, database time, serializer time and render time of one request.
+    Shared by the threads serving the request, as the context is copied to
+    them.
+    """
+
+    __slots__ = (
+        "started",
+        "queries",
+        "db_time",
+        "serialize_time",
+        "serializing",
+        "render_time",
+    )
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+
+    @property
+    def total_time(self) -> float:
+        return perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += perf_counter() - started
+
+
+def _install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorder() -> None:
+    """
+    Record the queries of every connection: the connections of this thread
+    now, and those of other threads, like the async view pool, when they
+    connect.
+    """
+    connection_created.connect(_install, dispatch_uid="query_metrics")
+    for connection in connections.all():
+        _install(connection)
+
+
+@contextmanager
+def measure_render():
+    """Add the time spent in the block to the render time of the request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.render_time += perf_counter() - started
+
+
+@contextmanager
+def measure_serialize():
+    """
+    Add the time spent in the block to the serializer time of the request.
+    Blocks nested in a measured one, like nested serializers, are not
+    counted twice.
+    """
+    metrics = current_metrics.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_time += perf_counter() - started
+        metrics.serializing = False
+
+
+class MeasuredSerializerMixin:
+    """Count the `to_representation` time of the serializer, see `RequestMetrics`."""
+
+    def to_representation(self, instance):
+        with measure_serialize():
+            return super().to_representation(instance)
+
+
+class EndpointStats:
+    """Totals of the requests to one endpoint, by `(view name, method)`."""
+
+    __slots__ = (
+        "requests",
+        "queries",
+        "max_queries",
+        "db_time",
+        "serialize_time",
+        "render_time",
+        "total_time",
+        "response_bytes",
+        "over_budget",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.response_bytes = 0
+        self.over_budget = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def record_request(view_name, method, metrics, response_bytes, over_budget) -> None:
+    total_time = metrics.total_time
+    with _endpoints_lock:
+        stats = _endpoints.get((view_name, method))
+        if stats is None:
+            stats = _endpoints[(view_name, method)] = EndpointStats()
+        stats.requests += 1
+        stats.queries += metrics.queries
+        stats.max_queries = max(stats.max_queries, metrics.queries)
+        stats.db_time += metrics.db_time
+        stats.serialize_time += metrics.serialize_time
+        stats.render_time += metrics.render_time
+        stats.total_time += total_time
+        stats.response_bytes += response_bytes
+        stats.over_budget += over_budget
+
+
+def endpoint_stats() -> list:
+    """Totals of this process by endpoint, busiest first."""
+    with _endpoints_lock:
+        rows = [
+            {"view": view_name, "method": method, **stats.as_dict()}
+            for (view_name, method), stats in _endpoints.items()
+        ]
+    return sorted(rows, key=lambda row: row["requests"], reverse=True)
+
+
+def reset_endpoint_stats() -> None:
+    with _endpoints_lock:
+        _endpoints.clear()
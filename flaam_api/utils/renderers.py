@@ -0,0 +1,58 @@
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .query_metrics import measure_render
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    The output matches `JSONRenderer` for compact, unicode, unindented
+    responses (our settings): datetimes and the types orjson does not know,
+    like lazy strings, querysets and Decimals, go through DRF's own encoder.
+    Indented output, `UNICODE_JSON = False` and `COMPACT_JSON = False` fall
+    back to `JSONRenderer`.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure_render():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if self.ensure_ascii or not self.compact or indent:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=self.options)
+        # U+2028 and U+2029 are escaped like JSONRenderer does, see there
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    Renders the text exposition format of `prometheus.exposition`, with its
+    versioned content type. Any `text/plain` request is accepted, the version
+    is only set on the response.
+    """
+
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = self.content_type
+        if isinstance(data, dict):  # errors
+            data = f"{data.get('detail', data)}\n"
+        return data.encode(self.charset)
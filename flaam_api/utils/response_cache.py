@@ -0,0 +1,108 @@
+import time
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .prometheus import cache_requests
+
+CACHE_ALIAS = "responses"
+
+# labels of the models cached responses depend on, see `watch_models`
+watched_models = set()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(label: str) -> str:
+    return f"generation:{label.lower()}"
+
+
+def get_generations(labels) -> list:
+    """
+    Current generation numbers of the models named by `labels`.
+    """
+    cache = get_cache()
+    keys = [_generation_key(label) for label in labels]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # start from the clock, so an evicted generation is never reused
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(model) -> None:
+    """
+    Invalidate every cached response that depends on `model` once the
+    current transaction commits.
+    """
+    key = _generation_key(model._meta.label)
+
+    def bump():
+        cache = get_cache()
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def normalize_query(query_params) -> str:
+    """
+    Query string with sorted keys and without empty parameters,
+    so equivalent requests share a cache key.
+    """
+    pairs = []
+    for key in sorted(query_params):
+        for value in query_params.getlist(key):
+            if value != "":
+                pairs.append(f"{key}={value}")
+    return "&".join(pairs)
+
+
+def list_cache_key(request, labels) -> str:
+    generations = ".".join(str(g) for g in get_generations(labels))
+    url = f"{request.get_host()}{request.path}?{normalize_query(request.query_params)}"
+    return f"list:{generations}:{sha1(url.encode()).hexdigest()}"
+
+
+def get_response(key):
+    data = get_cache().get(key)
+    cache_requests.inc(cache=CACHE_ALIAS, result="miss" if data is None else "hit")
+    return data
+
+
+def set_response(key, data) -> None:
+    get_cache().set(key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def on_model_change(sender, **kwargs) -> None:
+    bump_generation(sender)
+
+
+def on_m2m_change(sender, instance, action, model, **kwargs) -> None:
+    if action.startswith("post_"):
+        for changed in (instance, model):
+            if changed._meta.label in watched_models:
+                bump_generation(changed)
+
+
+def watch_models(labels) -> None:
+    """
+    Bump the generation of the models named by `labels` whenever one of
+    their rows is saved or deleted. Other models are left alone, so their
+    saves schedule no cache writes.
+    """
+    for label in labels:
+        if label in watched_models:
+            continue
+        watched_models.add(label)
+        post_save.connect(on_model_change, sender=label)
+        post_delete.connect(on_model_change, sender=label)
@@ -0,0 +1,11 @@
+from django.test import TestCase as DjangoTestCase
+from django.test import override_settings
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class TestCase(DjangoTestCase):
+    """
+    Base test case of the project: requests running more queries than the
+    query budget of their view fail with `QueryBudgetExceeded` (see
+    `QueryMetricsMiddleware`).
+    """
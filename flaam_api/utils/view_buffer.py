@@ -0,0 +1,220 @@
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from .counters import reconcile
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewBackend:
+    """
+    Keeps pending view events in process memory.
+    """
+
+    def __init__(self, **options):
+        self._events = set()
+        self._lock = threading.Lock()
+
+    def push(self, event: tuple) -> int:
+        with self._lock:
+            self._events.add(event)
+            return len(self._events)
+
+    def drain(self) -> set:
+        with self._lock:
+            events, self._events = self._events, set()
+        return events
+
+
+class CacheViewBackend:
+    """
+    Shares pending view events between processes through a redis cache, so
+    any worker (or the `flush_views` command) can flush them, like
+    `responses` with a `redis://` `RESPONSE_CACHE_URL`. Other caches are
+    refused: the file and locmem caches implement `incr` and `add` as a get
+    then a set, so two processes could claim the same slot and lose views.
+
+    Events are kept in numbered slots: a push claims the next number, then
+    writes its event. A drain takes the written slots in order and stops at
+    the first one not written yet, so it never skips a push in progress. A
+    slot still empty on the next drain belongs to a push that never
+    finished, and is passed over. One drain runs at a time, holding a lock
+    key for at most `lock_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        alias: str = "responses",
+        key_prefix: str = "view-buffer",
+        lock_timeout: int = 60,
+    ):
+        if not isinstance(caches[alias], RedisCache):
+            raise ImproperlyConfigured(
+                f"CacheViewBackend needs a redis cache, the {alias!r} cache "
+                "has no atomic incr."
+            )
+        self.alias = alias
+        self.key_prefix = key_prefix
+        self.lock_timeout = lock_timeout
+        self._gap = None
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, name) -> str:
+        return f"{self.key_prefix}:{name}"
+
+    def push(self, event: tuple) -> int:
+        self.cache.add(self._key("tail"), 0, timeout=None)
+        tail = self.cache.incr(self._key("tail"))
+        self.cache.set(self._key(tail), event, timeout=None)
+        return tail - self.cache.get(self._key("head"), 0)
+
+    def drain(self) -> set:
+        if not self.cache.add(self._key("lock"), 1, timeout=self.lock_timeout):
+            # another process is draining
+            return set()
+        try:
+            return self._drain()
+        finally:
+            self.cache.delete(self._key("lock"))
+
+    def _drain(self) -> set:
+        head = self.cache.get(self._key("head"), 0)
+        tail = self.cache.get(self._key("tail"), 0)
+        if tail <= head:
+            return set()
+        events = self.cache.get_many([self._key(i) for i in range(head + 1, tail + 1)])
+        end = head
+        for index in range(head + 1, tail + 1):
+            if self._key(index) not in events and index != self._gap:
+                self._gap = index
+                break
+            end = index
+        keys = [self._key(i) for i in range(head + 1, end + 1)]
+        if not keys:
+            return set()
+        self.cache.set(self._key("head"), end, timeout=None)
+        self.cache.delete_many(keys)
+        return {events[key] for key in keys if key in events}
+
+
+class ViewBuffer:
+    """
+    Write-behind buffer for view tracking.
+
+    Views are recorded as (model label, object pk, user pk) events and
+    written to the `views` through tables in bulk, either periodically by a
+    background thread, once `max_size` events are pending, or on exit.
+    """
+
+    def __init__(self, backend, flush_interval: float = 10, max_size: int = 1000):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._flush_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._timer_pid = None
+
+    @classmethod
+    def from_settings(cls) -> "ViewBuffer":
+        config = getattr(settings, "VIEW_BUFFER", {})
+        backend = import_string(
+            config.get("BACKEND", "flaam_api.utils.view_buffer.LocalViewBackend")
+        )
+        return cls(
+            backend(**config.get("OPTIONS", {})),
+            flush_interval=config.get("FLUSH_INTERVAL", 10),
+            max_size=config.get("MAX_SIZE", 1000),
+        )
+
+    def record(self, instance, user) -> None:
+        """Queue a view of `instance` by `user`."""
+        if not user.is_authenticated:
+            return
+        pending = self.backend.push((instance._meta.label, instance.pk, user.pk))
+        self._ensure_timer()
+        if pending >= self.max_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write pending views to the through tables and update the view counters
+        of the touched objects in the same transaction.
+        Returns the number of events flushed.
+        """
+        with self._flush_lock:
+            events = self.backend.drain()
+            if not events:
+                return 0
+
+            grouped = defaultdict(set)
+            for label, object_pk, user_pk in events:
+                grouped[label].add((object_pk, user_pk))
+
+            try:
+                self._write(grouped)
+            except Exception:
+                # put the events back so they are retried on the next flush
+                for event in events:
+                    self.backend.push(event)
+                raise
+            return len(events)
+
+    def _write(self, grouped: dict) -> None:
+        with transaction.atomic():
+            for label, pairs in grouped.items():
+                model = apps.get_model(label)
+                # skip objects deleted since the view was recorded
+                pks = set(
+                    model.objects.filter(
+                        pk__in={object_pk for object_pk, _ in pairs}
+                    ).values_list("pk", flat=True)
+                )
+                through = model.views.through
+                source = f"{model.views.field.m2m_field_name()}_id"
+                target = f"{model.views.field.m2m_reverse_field_name()}_id"
+                through.objects.bulk_create(
+                    [
+                        through(**{source: object_pk, target: user_pk})
+                        for object_pk, user_pk in pairs
+                        if object_pk in pks
+                    ],
+                    ignore_conflicts=True,
+                )
+                reconcile(model, pks=pks, fields=("view_count",))
+
+    def _ensure_timer(self) -> None:
+        # the timer thread does not survive a fork, so track the owning process
+        if not self.flush_interval or self._timer_pid == os.getpid():
+            return
+        with self._timer_lock:
+            if self._timer_pid != os.getpid():
+                self._timer_pid = os.getpid()
+                threading.Thread(target=self._run_timer, daemon=True).start()
+
+    def _run_timer(self) -> None:
+        event = threading.Event()
+        while not event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush view buffer")
+            finally:
+                connections.close_all()
+
+
+view_buffer = ViewBuffer.from_settings()
+atexit.register(view_buffer.flush)
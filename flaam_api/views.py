@@ -0,0 +1,53 @@
+from django.conf import settings
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db.pool import pool_stats
+from .utils.permissions import HasMetricsToken
+from .utils.prometheus import exposition
+from .utils.query_metrics import endpoint_stats
+from .utils.renderers import PrometheusRenderer
+
+
+class MetricsView(APIView):
+    """
+    Query count, database time, render time and response size totals by
+    endpoint, and the connection pool metrics, of the serving process.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @swagger_auto_schema(
+        tags=("metrics",),
+        operation_summary="Get the metrics of the serving process",
+        responses={
+            200: "Metrics by endpoint and database.",
+            401: "Unauthorized.",
+            403: "Forbidden.",
+        },
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        return Response({"endpoints": endpoint_stats(), "pools": pool_stats()})
+
+
+class PrometheusMetricsView(APIView):
+    """
+    Request, database, pool, cache and email metrics of every worker sharing
+    `METRICS_DIR`, in the Prometheus text format.
+    """
+
+    permission_classes = (HasMetricsToken,)
+    renderer_classes = (PrometheusRenderer,)
+    swagger_schema = None
+
+    def get_authenticators(self):
+        # the metrics token is no JWT, users only authenticate without one
+        if settings.METRICS_TOKEN:
+            return []
+        return super().get_authenticators()
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        return Response(exposition())
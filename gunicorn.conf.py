@@ -0,0 +1,15 @@
+import os
+
+from flaam_api.utils.prometheus import clear, mark_process_dead
+
+metrics_dir = os.getenv("METRICS_DIR")
+
+
+def on_starting(server):
+    if metrics_dir:
+        clear(metrics_dir)
+
+
+def child_exit(server, worker):
+    if metrics_dir:
+        mark_process_dead(metrics_dir, worker.pid)
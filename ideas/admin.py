@@ -9,7 +9,7 @@ class IdeaAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
     list_display = ("title", "owner", "created_at", "updated_at", "draft")
     list_display_links = list_display
     list_filter = ("created_at", "updated_at", "draft")
-    filter_horizontal = ("tags", "views", "upvotes", "downvotes")
+    filter_horizontal = ("tags", "views")
     search_fields = (
         "title",
         "description",
@@ -40,8 +40,6 @@ class IdeaAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
             {
                 "fields": (
                     "views",
-                    "upvotes",
-                    "downvotes",
                     "created_at",
                     "updated_at",
                 )
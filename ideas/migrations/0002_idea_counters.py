@@ -0,0 +1,65 @@
+# Generated by Django 4.0.3 on 2026-10-18 12:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field_name: str):
+    """
+    Count of rows in `queryset` pointing at the outer row through `field_name`,
+    copied from flaam_api.utils.counters as of this migration.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef("pk")})
+            .order_by()
+            .values(field_name)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Idea = apps.get_model("ideas", "Idea")
+    Implementation = apps.get_model("implementations", "Implementation")
+    Idea.objects.update(
+        upvote_count=count_subquery(Idea.upvotes.through.objects.all(), "idea"),
+        downvote_count=count_subquery(Idea.downvotes.through.objects.all(), "idea"),
+        view_count=count_subquery(Idea.views.through.objects.all(), "idea"),
+        implementation_count=count_subquery(Implementation.objects.all(), "idea"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ideas", "0001_initial"),
+        ("implementations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idea",
+            name="downvote_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="idea",
+            name="implementation_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="idea",
+            name="upvote_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="idea",
+            name="view_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.0.3 on 2026-10-18 12:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}.description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({row}.body, '')), 'C')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION ideas_idea_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row="NEW")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ideas_idea_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, body ON ideas_idea
+FOR EACH ROW EXECUTE PROCEDURE ideas_idea_search_vector_update();
+
+UPDATE ideas_idea SET search_vector = {SEARCH_VECTOR_SQL.format(row="ideas_idea")};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS ideas_idea_search_vector_trigger ON ideas_idea;
+DROP FUNCTION IF EXISTS ideas_idea_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ideas", "0003_remove_idea_upvotes_downvotes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idea",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="idea",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="idea_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
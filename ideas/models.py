@@ -1,9 +1,16 @@
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.expressions import ArraySubquery
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import OuterRef
 
+from flaam_api.utils.counters import CounterFieldsMixin
 
-class Idea(models.Model):
+
+class Idea(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=255)
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="ideas"
@@ -22,17 +29,49 @@ class Idea(models.Model):
     tags = models.ManyToManyField("tags.Tag", related_name="idea_tags")
     draft = models.BooleanField(default=True)
     archived = models.BooleanField(default=False)
-    upvotes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="upvoted_ideas"
-    )
-    downvotes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="downvoted_ideas"
-    )
+    votes = GenericRelation("votes.Vote")
+    feed_items = GenericRelation("feeds.FeedItem")
     views = models.ManyToManyField(
         settings.AUTH_USER_MODEL, blank=True, related_name="viewed_ideas"
     )
+    upvote_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    downvote_count = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
+    view_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    # maintained by a database trigger, see flaam_api.utils.hot
+    hot = models.FloatField(default=0, editable=False, db_index=True)
+    implementation_count = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
+    # maintained by a database trigger, see migration 0004
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    counter_fields = (
+        "upvote_count",
+        "downvote_count",
+        "view_count",
+        "hot",
+        "implementation_count",
+        "search_vector",
+    )
+
+    class Meta:
+        indexes = (GinIndex(fields=("search_vector",), name="idea_search_vector_idx"),)
+
     def __str__(self) -> str:
         return f"IDEA{self.id}"
+
+
+def tag_ids_subquery(idea: str = "pk") -> ArraySubquery:
+    """
+    Array of the tag ids of the idea referenced by `idea`, read from the
+    through table only. Annotate it as `tag_ids` for serializers to use.
+    """
+    return ArraySubquery(
+        Idea.tags.through.objects.filter(idea_id=OuterRef(idea))
+        .order_by("tag_id")
+        .values("tag_id")
+    )
@@ -1,13 +1,21 @@
 from django.http import QueryDict
 from rest_framework import serializers
 
+from flaam_api.utils.interactions import (
+    InteractionListSerializer,
+    InteractionSerializerMixin,
+)
 from flaam_api.utils.primitives import sha1sum
-from tags.serializers import TagSerializer
+from flaam_api.utils.query_metrics import MeasuredSerializerMixin
+from tags.models import Tag
+from tags.serializers import CatalogueTagListField
 
 from .models import Idea
 
 
-class IdeaSerializer(serializers.ModelSerializer):
+class IdeaSerializer(
+    MeasuredSerializerMixin, InteractionSerializerMixin, serializers.ModelSerializer
+):
     owner_avatar = serializers.CharField(source="owner.avatar", read_only=True)
     owner_username = serializers.CharField(source="owner.username", read_only=True)
     bookmarked = serializers.SerializerMethodField(read_only=True)
@@ -17,32 +25,16 @@ class IdeaSerializer(serializers.ModelSerializer):
     upvote_count = serializers.IntegerField(read_only=True)
     downvote_count = serializers.IntegerField(read_only=True)
     implementation_count = serializers.IntegerField(read_only=True)
+    tags = CatalogueTagListField(
+        child_relation=serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all()),
+        allow_empty=False,
+    )
 
-    def get_bookmarked(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            return obj.bookmarked_by.filter(pk=request.user.pk).exists()
-        return False
-
-    def get_viewed(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            return obj.views.filter(pk=request.user.pk).exists()
-        return False
-
-    def get_vote(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            if obj.upvotes.filter(pk=request.user.pk).exists():
-                return 1
-            elif obj.downvotes.filter(pk=request.user.pk).exists():
-                return -1
-        return 0
-
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        ret["tags"] = TagSerializer(instance.tags.all(), many=True).data
-        return ret
+    def update(self, instance, validated_data):
+        # the `tag_ids` annotation is stale once the tags are set
+        if "tags" in validated_data:
+            vars(instance).pop(CatalogueTagListField.annotation, None)
+        return super().update(instance, validated_data)
 
     def to_internal_value(self, data):
         if isinstance(data, QueryDict):
@@ -79,3 +71,4 @@ class IdeaSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("owner",)
+        list_serializer_class = InteractionListSerializer
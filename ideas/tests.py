@@ -0,0 +1,7 @@
+from flaam_api.utils import parity
+
+from .views import IdeaListView
+
+
+class CompiledIdeaSerializerTests(parity.CompiledSerializerParityTestCase):
+    view_class = IdeaListView
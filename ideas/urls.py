@@ -1,10 +1,19 @@
 from django.urls import path
 
-from .views import BookmarkIdeaView, IdeaDetailView, IdeaListView, VoteIdeaView
+from flaam_api.utils.async_views import as_async_view
+
+from .views import (
+    BookmarkIdeaView,
+    IdeaDetailView,
+    IdeaExportView,
+    IdeaListView,
+    VoteIdeaView,
+)
 
 urlpatterns = [
-    path("ideas", IdeaListView.as_view(), name="ideas"),
-    path("idea/<int:pk>", IdeaDetailView.as_view(), name="idea"),
+    path("ideas", as_async_view(IdeaListView), name="ideas"),
+    path("ideas/export", IdeaExportView.as_view(), name="ideas_export"),
+    path("idea/<int:pk>", as_async_view(IdeaDetailView), name="idea"),
     path("idea/<int:pk>/vote", VoteIdeaView.as_view(), name="idea_vote"),
     path("idea/<int:pk>/bookmark", BookmarkIdeaView.as_view(), name="idea_bookmark"),
 ]
@@ -1,52 +1,55 @@
-from django.db.models import Count
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.exceptions import ParseError
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import (
+    GenericAPIView,
+    ListCreateAPIView,
+    RetrieveUpdateAPIView,
+)
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from feeds.models import FeedItem
+from flaam_api.utils.mixins import (
+    CachedListMixin,
+    CompiledListMixin,
+    ConditionalGetMixin,
+    NDJSONExportMixin,
+    SparseFieldsetMixin,
+)
 from flaam_api.utils.permissions import IsOwnerOrReadOnly
+from flaam_api.utils.view_buffer import view_buffer
+from tags.catalogue import tag_catalogue
+from votes.models import Vote
 
 from .filters import IdeaFilterSet
-from .models import Idea
+from .models import Idea, tag_ids_subquery
 from .serializers import IdeaSerializer
 
 
-class IdeaListView(ListCreateAPIView):
+class IdeaListView(
+    SparseFieldsetMixin, CachedListMixin, CompiledListMixin, ListCreateAPIView
+):
     """
     List all ideas or create a new one.
     """
 
+    cache_models = ("ideas.Idea", "tags.Tag")
     serializer_class = IdeaSerializer
-    queryset = (
-        Idea.objects.all()
-        .select_related("owner")
-        .prefetch_related(
-            "upvotes",
-            "downvotes",
-            "views",
-            "tags",
-            "implementations",
-        )
-        .annotate(
-            upvote_count=Count("upvotes"),
-            downvote_count=Count("downvotes"),
-            view_count=Count("views"),
-            implementation_count=Count("implementations"),
-        )
-    )
+    query_budget = {"GET": 10}
+    queryset = Idea.objects.select_related("owner").annotate(tag_ids=tag_ids_subquery())
     ordering = ("-created_at",)
     filterset_class = IdeaFilterSet
-    search_fields = (
-        "@title",
-        "@description",
-    )
+    search_vector_field = "search_vector"
     ordering_fields = (
+        "rank",
+        "hot",
         "upvote_count",
         "downvote_count",
         "view_count",
@@ -56,7 +59,10 @@ class IdeaListView(ListCreateAPIView):
     )
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            idea = serializer.save(owner=self.request.user)
+            if not idea.draft:
+                FeedItem.objects.publish(idea, idea.tags.values_list("pk", flat=True))
 
     @swagger_auto_schema(
         tags=("ideas",),
@@ -84,44 +90,92 @@ class IdeaListView(ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class IdeaDetailView(RetrieveUpdateAPIView):
+class IdeaExportView(NDJSONExportMixin, GenericAPIView):
+    """
+    Stream all ideas as newline delimited JSON, for staff.
+    """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = IdeaSerializer
+    queryset = Idea.objects.annotate(tag_ids=tag_ids_subquery())
+    filter_backends = ()
+    pagination_class = None
+
+    @swagger_auto_schema(
+        tags=("ideas",),
+        operation_summary="Export ideas",
+        manual_parameters=(
+            openapi.Parameter(
+                "updated_since",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME,
+                description="Only export ideas updated since this datetime",
+            ),
+        ),
+        responses={
+            200: "Newline delimited JSON, one idea per line.",
+            400: "Bad request.",
+            401: "Unauthorized.",
+            403: "Forbidden.",
+        },
+    )
+    def get(self, request: Request, *args, **kwargs) -> StreamingHttpResponse:
+        return self.export(request)
+
+
+class IdeaDetailView(SparseFieldsetMixin, ConditionalGetMixin, RetrieveUpdateAPIView):
     """
     Retrieve, update or delete an idea instance.
     """
 
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly)
     serializer_class = IdeaSerializer
-    queryset = (
-        Idea.objects.all()
-        .select_related("owner")
-        .prefetch_related(
-            "upvotes",
-            "downvotes",
-            "views",
-            "tags",
-            "implementations",
-        )
-        .annotate(
-            upvote_count=Count("upvotes"),
-            downvote_count=Count("downvotes"),
-            view_count=Count("views"),
-            implementation_count=Count("implementations"),
-        )
+    query_budget = {"GET": 8}
+    queryset = Idea.objects.select_related("owner").annotate(tag_ids=tag_ids_subquery())
+
+    etag_fields = (
+        "updated_at",
+        "upvote_count",
+        "downvote_count",
+        "view_count",
+        "implementation_count",
     )
 
+    def get_etag_parts(self, row: dict) -> list:
+        # tags are embedded from the tag catalogue
+        return [*super().get_etag_parts(row), tag_catalogue.current_version()]
+
+    def perform_update(self, serializer):
+        was_draft = serializer.instance.draft
+        with transaction.atomic():
+            idea = serializer.save()
+            if was_draft and not idea.draft:
+                FeedItem.objects.publish(idea, idea.tags.values_list("pk", flat=True))
+            elif idea.draft and not was_draft:
+                FeedItem.objects.retract(idea)
+
     @swagger_auto_schema(
         tags=("ideas",),
         operation_summary="Get idea details",
         responses={
             200: IdeaSerializer,
+            304: "Not modified.",
             401: "Unauthorized.",
             404: "Not found.",
         },
     )
     def get(self, request: Request, pk: int, *args, **kwargs) -> Response:
-        # increment view count
-        self.get_object().views.add(request.user)
-        return super().get(request, pk, *args, **kwargs)
+        response = self.get_not_modified_response(request)
+        if response is not None:
+            return response
+        instance = self.get_object()
+        view_buffer.record(instance, request.user)
+        data = self.get_serializer(instance).data
+        # the view is written behind, so reflect it in the response right away
+        if "viewed" in data:
+            data["viewed"] = True
+        return Response(data)
 
     @swagger_auto_schema(
         tags=("ideas",),
@@ -199,17 +253,9 @@ class VoteIdeaView(APIView):
         idea = get_object_or_404(Idea, pk=pk)
 
         value = request.query_params.get("value")
-        if value == "0":
-            idea.downvotes.remove(request.user)
-            idea.upvotes.remove(request.user)
-        elif value == "1":
-            idea.upvotes.add(request.user)
-            idea.downvotes.remove(request.user)
-        elif value == "-1":
-            idea.downvotes.add(request.user)
-            idea.upvotes.remove(request.user)
-        else:
+        if value not in ("-1", "0", "1"):
             raise ParseError("Invalid vote value.")
+        Vote.objects.cast(idea, request.user, int(value))
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -0,0 +1,72 @@
+# Generated by Django 4.0.3 on 2026-10-18 12:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field_name: str):
+    """
+    Count of rows in `queryset` pointing at the outer row through `field_name`,
+    copied from flaam_api.utils.counters as of this migration.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef("pk")})
+            .order_by()
+            .values(field_name)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Implementation = apps.get_model("implementations", "Implementation")
+    ImplementationComment = apps.get_model("implementations", "ImplementationComment")
+    Implementation.objects.update(
+        upvote_count=count_subquery(
+            Implementation.upvotes.through.objects.all(), "implementation"
+        ),
+        downvote_count=count_subquery(
+            Implementation.downvotes.through.objects.all(), "implementation"
+        ),
+        view_count=count_subquery(
+            Implementation.views.through.objects.all(), "implementation"
+        ),
+        comments_count=count_subquery(
+            ImplementationComment.objects.all(), "implementation"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("implementations", "0002_remove_implementation_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="implementation",
+            name="comments_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="implementation",
+            name="downvote_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="implementation",
+            name="upvote_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="implementation",
+            name="view_count",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
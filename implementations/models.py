@@ -1,9 +1,12 @@
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
+from flaam_api.utils.counters import CounterFieldsMixin
 
-class Implementation(models.Model):
+
+class Implementation(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=255)
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -22,18 +25,32 @@ class Implementation(models.Model):
     completed_milestones = ArrayField(
         models.CharField(max_length=10), size=20, default=list, blank=True
     )
-    upvotes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="upvoted_implementations"
-    )
-    downvotes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="downvoted_implementations"
-    )
+    votes = GenericRelation("votes.Vote")
+    feed_items = GenericRelation("feeds.FeedItem")
     views = models.ManyToManyField(
         settings.AUTH_USER_MODEL, blank=True, related_name="viewed_implementations"
     )
+    upvote_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    downvote_count = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
+    view_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    # maintained by a database trigger, see flaam_api.utils.hot
+    hot = models.FloatField(default=0, editable=False, db_index=True)
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    counter_fields = (
+        "upvote_count",
+        "downvote_count",
+        "view_count",
+        "hot",
+        "comments_count",
+    )
+
     def __str__(self) -> str:
         return f"IMPL{self.id}"
 
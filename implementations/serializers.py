@@ -1,11 +1,18 @@
 from rest_framework import serializers
 
-from tags.serializers import TagSerializer
+from flaam_api.utils.interactions import (
+    InteractionListSerializer,
+    InteractionSerializerMixin,
+)
+from flaam_api.utils.query_metrics import MeasuredSerializerMixin
+from tags.serializers import CatalogueTagListField
 
 from .models import Implementation, ImplementationComment
 
 
-class ImplementationSerializer(serializers.ModelSerializer):
+class ImplementationSerializer(
+    MeasuredSerializerMixin, InteractionSerializerMixin, serializers.ModelSerializer
+):
     owner_username = serializers.CharField(source="owner.username", read_only=True)
     owner_avatar = serializers.CharField(source="owner.avatar", read_only=True)
     bookmarked = serializers.SerializerMethodField(read_only=True)
@@ -16,31 +23,17 @@ class ImplementationSerializer(serializers.ModelSerializer):
     downvote_count = serializers.IntegerField(read_only=True)
     comments_count = serializers.IntegerField(read_only=True)
     milestones = serializers.ListField(source="idea.milestones", read_only=True)
-    tags = serializers.SerializerMethodField(read_only=True)
+    tags = CatalogueTagListField(
+        source="idea.tags",
+        child_relation=serializers.PrimaryKeyRelatedField(read_only=True),
+        read_only=True,
+    )
 
-    def get_bookmarked(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            return obj.bookmarked_by.filter(pk=request.user.pk).exists()
-        return False
-
-    def get_viewed(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            return obj.views.filter(pk=request.user.pk).exists()
-        return False
-
-    def get_vote(self, obj):
-        request = self.context.get("request")
-        if request is not None:
-            if obj.upvotes.filter(pk=request.user.pk).exists():
-                return 1
-            elif obj.downvotes.filter(pk=request.user.pk).exists():
-                return -1
-        return 0
-
-    def get_tags(self, obj):
-        return TagSerializer(obj.idea.tags.all(), many=True).data
+    def update(self, instance, validated_data):
+        # the `tag_ids` annotation is stale once the idea changes
+        if "idea" in validated_data:
+            vars(instance).pop(CatalogueTagListField.annotation, None)
+        return super().update(instance, validated_data)
 
     class Meta:
         model = Implementation
@@ -70,10 +63,14 @@ class ImplementationSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("owner",)
+        # only changed by the accept and validate views, which credit reputation
+        read_only_fields = ("owner", "is_validated", "is_accepted")
+        list_serializer_class = InteractionListSerializer
 
 
-class ImplementationCommentSerializer(serializers.ModelSerializer):
+class ImplementationCommentSerializer(
+    MeasuredSerializerMixin, serializers.ModelSerializer
+):
     owner_avatar = serializers.CharField(source="owner.avatar", read_only=True)
     owner_username = serializers.CharField(source="owner.username", read_only=True)
 
@@ -0,0 +1,7 @@
+from flaam_api.utils import parity
+
+from .views import ImplementationListView
+
+
+class CompiledImplementationSerializerTests(parity.CompiledSerializerParityTestCase):
+    view_class = ImplementationListView
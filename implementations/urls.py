@@ -1,10 +1,13 @@
 from django.urls import path
 
+from flaam_api.utils.async_views import as_async_view
+
 from .views import (
     AcceptImplementationView,
     ImplementationCommentDetailView,
     ImplementationCommentListView,
     ImplementationDetailView,
+    ImplementationExportView,
     ImplementationListView,
     ValidateImplementationView,
     VoteImplementationView,
@@ -13,12 +16,17 @@ from .views import (
 urlpatterns = [
     path(
         "implementations",
-        ImplementationListView.as_view(),
+        as_async_view(ImplementationListView),
         name="implementation-list",
     ),
+    path(
+        "implementations/export",
+        ImplementationExportView.as_view(),
+        name="implementation-export",
+    ),
     path(
         "implementation/<int:pk>",
-        ImplementationDetailView.as_view(),
+        as_async_view(ImplementationDetailView),
         name="implementation-detail",
     ),
     path(
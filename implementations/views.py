@@ -1,17 +1,36 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import (
+    GenericAPIView,
+    ListCreateAPIView,
+    RetrieveUpdateDestroyAPIView,
+)
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.models import Reputation
+from feeds.models import FeedItem
+from flaam_api.utils.counters import increment
+from flaam_api.utils.mixins import (
+    CachedListMixin,
+    CompiledListMixin,
+    ConditionalGetMixin,
+    NDJSONExportMixin,
+    SparseFieldsetMixin,
+)
 from flaam_api.utils.permissions import IsOwnerOrReadOnly
+from flaam_api.utils.view_buffer import view_buffer
+from ideas.models import tag_ids_subquery
+from tags.catalogue import tag_catalogue
+from votes.models import Vote
 
 from .filters import ImplementationCommentFilterSet, ImplementationFilterSet
 from .models import Implementation, ImplementationComment
@@ -20,32 +39,28 @@ from .serializers import ImplementationCommentSerializer, ImplementationSerializ
 UserModel = get_user_model()
 
 
-class ImplementationListView(ListCreateAPIView):
+class ImplementationListView(
+    SparseFieldsetMixin, CachedListMixin, CompiledListMixin, ListCreateAPIView
+):
     """
     Implementation list view.
     """
 
+    cache_models = (
+        "implementations.Implementation",
+        "ideas.Idea",
+        "tags.Tag",
+    )
     serializer_class = ImplementationSerializer
-    queryset = (
-        Implementation.objects.all()
-        .select_related("owner")
-        .prefetch_related(
-            "upvotes",
-            "downvotes",
-            "views",
-            "comments",
-        )
-        .annotate(
-            upvote_count=Count("upvotes"),
-            downvote_count=Count("downvotes"),
-            view_count=Count("views"),
-            comments_count=Count("comments"),
-        )
+    query_budget = {"GET": 10}
+    queryset = Implementation.objects.select_related("owner", "idea").annotate(
+        tag_ids=tag_ids_subquery("idea")
     )
     ordering = ("-created_at",)
     filterset_class = ImplementationFilterSet
     search_fields = ("title", "description", "tags__name", "idea__title")
     ordering_fields = (
+        "hot",
         "upvote_count",
         "downvote_count",
         "view_count",
@@ -56,7 +71,14 @@ class ImplementationListView(ListCreateAPIView):
     )
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            implementation = serializer.save(owner=self.request.user)
+            increment(implementation.idea, implementation_count=1)
+            if not implementation.draft:
+                FeedItem.objects.publish(
+                    implementation,
+                    implementation.idea.tags.values_list("pk", flat=True),
+                )
 
     @swagger_auto_schema(
         tags=("implementations",),
@@ -82,43 +104,112 @@ class ImplementationListView(ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class ImplementationDetailView(RetrieveUpdateDestroyAPIView):
+class ImplementationExportView(NDJSONExportMixin, GenericAPIView):
+    """
+    Stream all implementations as newline delimited JSON, for staff.
+    """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = ImplementationSerializer
+    queryset = Implementation.objects.annotate(tag_ids=tag_ids_subquery("idea"))
+    filter_backends = ()
+    pagination_class = None
+
+    @swagger_auto_schema(
+        tags=("implementations",),
+        operation_summary="Export implementations",
+        manual_parameters=(
+            openapi.Parameter(
+                "updated_since",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME,
+                description="Only export implementations updated since this datetime",
+            ),
+        ),
+        responses={
+            200: "Newline delimited JSON, one implementation per line.",
+            400: "Bad request.",
+            401: "Unauthorized.",
+            403: "Forbidden.",
+        },
+    )
+    def get(self, request: Request, *args, **kwargs) -> StreamingHttpResponse:
+        return self.export(request)
+
+
+class ImplementationDetailView(
+    SparseFieldsetMixin, ConditionalGetMixin, RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve, update or delete a implementation instance.
     """
 
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly)
     serializer_class = ImplementationSerializer
-    queryset = (
-        Implementation.objects.all()
-        .select_related("owner")
-        .prefetch_related(
-            "upvotes",
-            "downvotes",
-            "views",
-            "comments",
-        )
-        .annotate(
-            upvote_count=Count("upvotes"),
-            downvote_count=Count("downvotes"),
-            view_count=Count("views"),
-            comments_count=Count("comments"),
-        )
+    query_budget = {"GET": 8}
+    queryset = Implementation.objects.select_related("owner", "idea").annotate(
+        tag_ids=tag_ids_subquery("idea")
     )
 
+    etag_fields = (
+        "updated_at",
+        "idea__updated_at",
+        "upvote_count",
+        "downvote_count",
+        "view_count",
+        "comments_count",
+    )
+
+    def get_etag_parts(self, row: dict) -> list:
+        # tags are embedded from the tag catalogue
+        return [*super().get_etag_parts(row), tag_catalogue.current_version()]
+
+    def perform_update(self, serializer):
+        previous_idea = serializer.instance.idea
+        was_published = not serializer.instance.draft
+        with transaction.atomic():
+            implementation = serializer.save()
+            idea_changed = implementation.idea_id != previous_idea.pk
+            if idea_changed:
+                increment(previous_idea, implementation_count=-1)
+                increment(implementation.idea, implementation_count=1)
+            # the idea decides the tags, and so who gets it in their feed
+            if was_published and (implementation.draft or idea_changed):
+                FeedItem.objects.retract(implementation)
+            if not implementation.draft and (not was_published or idea_changed):
+                FeedItem.objects.publish(
+                    implementation,
+                    implementation.idea.tags.values_list("pk", flat=True),
+                )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            Reputation.objects.retract(instance)
+            increment(instance.idea, implementation_count=-1)
+            instance.delete()
+
     @swagger_auto_schema(
         tags=("implementations",),
         operation_summary="Get implementation details",
         responses={
             200: ImplementationSerializer,
+            304: "Not modified.",
             401: "Unauthorized.",
             404: "Not found.",
         },
     )
     def get(self, request: Request, *args, **kwargs) -> Response:
-        # increment view count
-        self.get_object().views.add(request.user)
-        return super().get(request, *args, **kwargs)
+        response = self.get_not_modified_response(request)
+        if response is not None:
+            return response
+        instance = self.get_object()
+        view_buffer.record(instance, request.user)
+        data = self.get_serializer(instance).data
+        # the view is written behind, so reflect it in the response right away
+        if "viewed" in data:
+            data["viewed"] = True
+        return Response(data)
 
     @swagger_auto_schema(
         tags=("implementations",),
@@ -159,7 +250,9 @@ class ImplementationDetailView(RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
-class ImplementationCommentListView(ListCreateAPIView):
+class ImplementationCommentListView(
+    SparseFieldsetMixin, CachedListMixin, ListCreateAPIView
+):
 
     serializer_class = ImplementationCommentSerializer
     queryset = ImplementationComment.objects.select_related("owner").all()
@@ -169,7 +262,10 @@ class ImplementationCommentListView(ListCreateAPIView):
     ordering_fields = ("created_at", "updated_at")
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(owner=self.request.user)
+            increment(comment.implementation, comments_count=1)
+            Reputation.objects.adjust(comment.owner_id, comments=1)
 
     @swagger_auto_schema(
         tags=("implementation-comments",),
@@ -195,13 +291,21 @@ class ImplementationCommentListView(ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class ImplementationCommentDetailView(RetrieveUpdateDestroyAPIView):
+class ImplementationCommentDetailView(
+    SparseFieldsetMixin, RetrieveUpdateDestroyAPIView
+):
 
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly)
     serializer_class = ImplementationCommentSerializer
 
     queryset = ImplementationComment.objects.all()
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            increment(instance.implementation, comments_count=-1)
+            Reputation.objects.adjust(instance.owner_id, comments=-1)
+            instance.delete()
+
     @swagger_auto_schema(
         tags=("implementation-comments",),
         operation_summary="Get implementation comment details",
@@ -281,23 +385,37 @@ class VoteImplementationView(APIView):
     def post(self, request: Request, pk: int, *args, **kwargs) -> Response:
         implementation = get_object_or_404(Implementation, pk=pk)
         value = request.query_params.get("value")
-
-        value = request.query_params.get("value")
-        if value == "0":
-            implementation.downvotes.remove(request.user)
-            implementation.upvotes.remove(request.user)
-        elif value == "1":
-            implementation.upvotes.add(request.user)
-            implementation.downvotes.remove(request.user)
-        elif value == "-1":
-            implementation.downvotes.add(request.user)
-            implementation.upvotes.remove(request.user)
-        else:
+        if value not in ("-1", "0", "1"):
             raise ValidationError("Invalid vote value.")
+        Vote.objects.cast(implementation, request.user, int(value))
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# reputation counter of each flag set by the owner of the idea
+FLAG_REPUTATION = {
+    "is_validated": "validated_implementations",
+    "is_accepted": "accepted_implementations",
+}
+
+
+def set_flag(implementation, flag: str, value: bool) -> None:
+    """
+    Set `flag` of `implementation` to `value`, and credit or take back the
+    reputation of its owner when it changes. The flag is read again with the
+    row locked, so concurrent requests change it, and credit it, once.
+    """
+    with transaction.atomic():
+        locked = Implementation.objects.select_for_update().get(pk=implementation.pk)
+        if getattr(locked, flag) == value:
+            return
+        Reputation.objects.adjust(
+            locked.owner_id, **{FLAG_REPUTATION[flag]: 1 if value else -1}
+        )
+        setattr(locked, flag, value)
+        locked.save(update_fields=(flag, "updated_at"))
+
+
 class ValidateImplementationView(APIView):
     """
     Validate implementation view.
@@ -323,8 +441,7 @@ class ValidateImplementationView(APIView):
             raise PermissionDenied(
                 "Only the owner of the idea can perform this action."
             )
-        implementation.is_validated = True
-        implementation.save()
+        set_flag(implementation, "is_validated", True)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @swagger_auto_schema(
@@ -345,8 +462,7 @@ class ValidateImplementationView(APIView):
             raise PermissionDenied(
                 "Only the owner of the idea can perform this action."
             )
-        implementation.is_validated = False
-        implementation.save()
+        set_flag(implementation, "is_validated", False)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -375,8 +491,7 @@ class AcceptImplementationView(APIView):
             raise PermissionDenied(
                 "Only the owner of the idea can perform this action."
             )
-        implementation.is_accepted = True
-        implementation.save()
+        set_flag(implementation, "is_accepted", True)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @swagger_auto_schema(
@@ -397,6 +512,5 @@ class AcceptImplementationView(APIView):
             raise PermissionDenied(
                 "Only the owner of the idea can perform this action."
             )
-        implementation.is_accepted = False
-        implementation.save()
+        set_flag(implementation, "is_accepted", False)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,89 @@
+import threading
+from bisect import bisect_left
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Tag
+
+
+class TagCatalogue:
+    """
+    Process-local copy of the tags table, used to embed tags in idea and
+    implementation responses and to autocomplete tag names.
+
+    Every process keeps its own copy and compares it against a version key in
+    the `TAG_CATALOGUE_CACHE` cache on each access. Saving or deleting a tag
+    replaces the version, which makes every process sharing that cache reload
+    its copy on next use. A process-local cache only reaches the process that
+    changed the tag, so run several workers with a shared one.
+    """
+
+    version_key = "tags:catalogue:version"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        # (sorted names, matching ids, tags by id), swapped as a whole on reload
+        self._index = ((), (), {})
+
+    @property
+    def cache(self):
+        return caches[settings.TAG_CATALOGUE_CACHE]
+
+    def current_version(self) -> str:
+        cache = self.cache
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid4().hex, timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def invalidate(self) -> None:
+        self.cache.set(self.version_key, uuid4().hex, timeout=None)
+
+    def _refresh(self, version: str = None, force: bool = False) -> None:
+        if version is None:
+            version = self.current_version()
+        if version == self._version and not force:
+            return
+        with self._lock:
+            if version == self._version and not force:
+                return
+            rows = list(Tag.objects.order_by("name").values_list("name", "id"))
+            names, ids = zip(*rows) if rows else ((), ())
+            by_id = {pk: {"id": pk, "name": name} for name, pk in rows}
+            self._index = (names, ids, by_id)
+            self._version = version
+
+    def get_many(self, tag_ids, version: str = None) -> list:
+        """
+        `{id, name}` dicts for `tag_ids`, in the given order. Renamed tags are
+        picked up through the shared version, looked up in the cache unless
+        `version` is given, ids missing from the copy force a reload.
+        """
+        self._refresh(version)
+        by_id = self._index[2]
+        if any(pk not in by_id for pk in tag_ids):
+            # created in a transaction that has not invalidated the version yet
+            self._refresh(version, force=True)
+            by_id = self._index[2]
+        return [dict(by_id[pk]) for pk in tag_ids if pk in by_id]
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> list:
+        """
+        Tags whose name starts with `prefix`, in alphabetical order.
+        """
+        self._refresh()
+        names, ids, _ = self._index
+        prefix = prefix.lower()
+        results = []
+        for i in range(bisect_left(names, prefix), len(names)):
+            if len(results) == limit or not names[i].startswith(prefix):
+                break
+            results.append({"id": ids[i], "name": names[i]})
+        return results
+
+
+tag_catalogue = TagCatalogue()
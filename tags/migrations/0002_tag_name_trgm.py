@@ -0,0 +1,22 @@
+# Generated by Django 4.0.3 on 2026-10-18 12:57
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tags", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="tag_name_trgm_idx", opclasses=("gin_trgm_ops",)
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 from .validators import TagNameValidator
@@ -20,5 +21,12 @@ class Tag(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = (
+            GinIndex(
+                fields=("name",), name="tag_name_trgm_idx", opclasses=("gin_trgm_ops",)
+            ),
+        )
+
     def __str__(self) -> str:
         return f"T{self.id} - {self.name}"
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from rest_framework.fields import get_attribute
 
+from flaam_api.utils.query_metrics import MeasuredSerializerMixin
+
+from .catalogue import tag_catalogue
 from .models import Tag
 
 
-class TagDetailSerializer(serializers.ModelSerializer):
+class TagDetailSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Tag Detail Serializer"""
 
     class Meta:
@@ -13,9 +17,39 @@ class TagDetailSerializer(serializers.ModelSerializer):
         # TODO: add related fields
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     """Tag Serializer"""
 
     class Meta:
         model = Tag
         fields = ("id", "name")
+
+
+class CatalogueTagListField(serializers.ManyRelatedField):
+    """
+    Tags written as a list of ids, like a many related primary key field,
+    and read as `{id, name}` objects from the tag catalogue, which reloads
+    whenever a tag is saved on any worker (see `TAG_CATALOGUE_CACHE`).
+
+    The ids are taken from a `tag_ids` annotation on the instance when there
+    is one, so listing rows needs no query for their tags. The catalogue
+    version is looked up once per serializer, so once per page, and kept in
+    the serializer context.
+    """
+
+    annotation = "tag_ids"
+    version_context = "tag_catalogue_version"
+
+    def get_attribute(self, instance):
+        tag_ids = getattr(instance, self.annotation, None)
+        if tag_ids is not None:
+            return tag_ids
+        tags = get_attribute(instance, self.source_attrs)
+        return list(tags.order_by("pk").values_list("pk", flat=True))
+
+    def to_representation(self, tag_ids):
+        context = self.context
+        version = context.get(self.version_context)
+        if version is None:
+            version = context[self.version_context] = tag_catalogue.current_version()
+        return tag_catalogue.get_many(tag_ids, version)
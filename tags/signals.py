@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalogue import tag_catalogue
+from .models import Tag
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_catalogue(sender, **kwargs):
+    # wait for the commit, or other processes could reload the old rows
+    transaction.on_commit(tag_catalogue.invalidate)
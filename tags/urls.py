@@ -1,9 +1,17 @@
 from django.urls import path
 
-from .views import FavouriteTagView, TagDetailView, TagListView
+from flaam_api.utils.async_views import as_async_view
+
+from .views import (
+    FavouriteTagView,
+    TagAutocompleteView,
+    TagDetailView,
+    TagListView,
+)
 
 urlpatterns = [
-    path("tags", TagListView.as_view()),
-    path("tag/<int:pk>", TagDetailView.as_view()),
+    path("tags", as_async_view(TagListView)),
+    path("tags/autocomplete", as_async_view(TagAutocompleteView)),
+    path("tag/<int:pk>", as_async_view(TagDetailView)),
     path("tag/<int:pk>/favourite", FavouriteTagView.as_view()),
 ]
@@ -1,26 +1,36 @@
 from django.contrib.auth import get_user_model
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from flaam_api.utils.mixins import (
+    CachedListMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+)
 from flaam_api.utils.paginations import CustomLimitOffsetPagination
 
+from .catalogue import tag_catalogue
 from .models import Tag
-from .serializers import TagDetailSerializer
+from .serializers import TagDetailSerializer, TagSerializer
 
 UserModel = get_user_model()
 
 
-class TagListView(ListCreateAPIView):
+class TagListView(SparseFieldsetMixin, CachedListMixin, ListCreateAPIView):
 
+    cache_models = ("tags.Tag",)
     pagination_class = CustomLimitOffsetPagination
     serializer_class = TagDetailSerializer
+    query_budget = {"GET": 6}
 
     def get_queryset(self):
         tags = Tag.objects.all()
@@ -36,8 +46,15 @@ class TagListView(ListCreateAPIView):
 
         tag_name = self.request.query_params.get("name", None)
         if tag_name:
-            vector = SearchVector("name")  # + SearchVector("description")
-            tags = tags.annotate(search=vector).filter(search__icontains=tag_name)
+            # tag names are lowercase, so a plain LIKE can use the trigram index
+            tag_name = tag_name.lower()
+            tags = (
+                tags.filter(
+                    Q(name__contains=tag_name) | Q(name__trigram_similar=tag_name)
+                )
+                .annotate(similarity=TrigramSimilarity("name", tag_name))
+                .order_by("-similarity", "name")
+            )
         return tags
 
     @swagger_auto_schema(
@@ -54,7 +71,7 @@ class TagListView(ListCreateAPIView):
                 "name",
                 in_=openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
-                description="Search tags by name",
+                description="Search tags by name, most similar first",
             ),
             openapi.Parameter(
                 "ids",
@@ -85,7 +102,49 @@ class TagListView(ListCreateAPIView):
         return super().post(request)
 
 
-class TagDetailView(RetrieveAPIView):
+class TagAutocompleteView(APIView):
+    """
+    Complete a tag name prefix from the in-process tag catalogue.
+    """
+
+    max_limit = 30
+
+    @swagger_auto_schema(
+        tags=("tags",),
+        operation_summary="Autocomplete tag names",
+        manual_parameters=(
+            openapi.Parameter(
+                "prefix",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description="Start of the tag name",
+            ),
+            openapi.Parameter(
+                "limit",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description="Number of tags to return",
+            ),
+        ),
+        responses={
+            200: TagSerializer(many=True),
+            401: "Unauthorized.",
+        },
+    )
+    def get(self, request: Request) -> Response:
+        prefix = request.query_params.get("prefix", "")
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = min(max(limit, 1), self.max_limit)
+        if not prefix:
+            return Response([])
+        return Response(tag_catalogue.autocomplete(prefix, limit))
+
+
+class TagDetailView(SparseFieldsetMixin, ConditionalGetMixin, RetrieveAPIView):
     serializer_class = TagDetailSerializer
     queryset = Tag.objects.all()
 
@@ -94,11 +153,15 @@ class TagDetailView(RetrieveAPIView):
         operation_summary="Get tag details",
         responses={
             200: TagDetailSerializer,
+            304: "Not modified.",
             401: "Unauthorized.",
             404: "Not found.",
         },
     )
     def get(self, request: Request, pk: int) -> Response:
+        response = self.get_not_modified_response(request)
+        if response is not None:
+            return response
         return super().get(request, pk)
 
 
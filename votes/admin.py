@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Vote
+
+
+class VoteAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "content_type", "object_id", "value", "created_at")
+    list_display_links = list_display
+    list_filter = ("content_type", "value")
+    raw_id_fields = ("user",)
+    readonly_fields = ("id", "created_at", "updated_at")
+    search_fields = ("user__username", "user__email")
+    ordering = ("-created_at",)
+
+
+admin.site.register(Vote, VoteAdmin)
@@ -0,0 +1,101 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from ideas.models import Idea
+from votes.models import Vote
+
+UserModel = get_user_model()
+
+VALUES = (1, -1, 0)
+
+
+def legacy_cast(target, user, value: int) -> None:
+    """
+    The previous voting path: read the current vote, then mutate it and the
+    counters in separate statements.
+    """
+    votes = Vote.objects.filter(
+        user=user,
+        content_type=ContentType.objects.get_for_model(target),
+        object_id=target.pk,
+    )
+    with transaction.atomic():
+        upvoted = votes.filter(value=Vote.UPVOTE).exists()
+        downvoted = votes.filter(value=Vote.DOWNVOTE).exists()
+        if value == 0:
+            votes.delete()
+        else:
+            votes.update_or_create(
+                user=user,
+                content_type=ContentType.objects.get_for_model(target),
+                object_id=target.pk,
+                defaults={"value": value},
+            )
+        type(target).objects.filter(pk=target.pk).update(
+            upvote_count=Greatest(
+                F("upvote_count") + int(value == 1) - int(upvoted), 0
+            ),
+            downvote_count=Greatest(
+                F("downvote_count") + int(value == -1) - int(downvoted), 0
+            ),
+        )
+
+
+STRATEGIES = {
+    "legacy": legacy_cast,
+    "upsert": Vote.objects.cast,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare votes/sec of the legacy and the single-statement voting paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--votes", type=int, default=3000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--threads", type=int, default=1)
+
+    def handle(self, *args, **options):
+        users = UserModel.objects.bulk_create(
+            UserModel(username=f"bench_voter_{i}", email=f"bench_voter_{i}@flaam.local")
+            for i in range(options["users"])
+        )
+        idea = Idea.objects.create(title="Vote benchmark", owner=users[0])
+        try:
+            for name, cast in STRATEGIES.items():
+                elapsed = self.run(cast, idea, users, options)
+                self.stdout.write(
+                    f"{name:>8}: {options['votes'] / elapsed:10.1f} votes/sec "
+                    f"({options['votes']} votes, {options['threads']} threads)"
+                )
+        finally:
+            idea.delete()
+            UserModel.objects.filter(username__startswith="bench_voter_").delete()
+
+    def run(self, cast, idea, users, options) -> float:
+        jobs = list(
+            itertools.islice(
+                zip(itertools.cycle(users), itertools.cycle(VALUES)), options["votes"]
+            )
+        )
+        threads = options["threads"]
+
+        def vote(chunk):
+            try:
+                for user, value in chunk:
+                    cast(idea, user, value)
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(vote, (jobs[i::threads] for i in range(threads))))
+        return time.perf_counter() - start
@@ -0,0 +1,104 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+TARGETS = (
+    ("ideas", "idea"),
+    ("implementations", "implementation"),
+    ("discussions", "discussion"),
+)
+
+# upvotes are copied first, so a user left in both tables keeps the upvote
+RELATIONS = (("upvotes", 1), ("downvotes", -1))
+
+
+def count_subquery(queryset, field_name: str):
+    """
+    Count of rows in `queryset` pointing at the outer row through `field_name`,
+    copied from flaam_api.utils.counters as of this migration.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef("pk")})
+            .order_by()
+            .values(field_name)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def copy_votes(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Vote = apps.get_model("votes", "Vote")
+    quote = schema_editor.quote_name
+
+    for app_label, model_name in TARGETS:
+        model = apps.get_model(app_label, model_name)
+        content_type, _ = ContentType.objects.get_or_create(
+            app_label=app_label, model=model_name
+        )
+        for relation, value in RELATIONS:
+            field = model._meta.get_field(relation)
+            through = field.remote_field.through
+            schema_editor.execute(
+                f"""
+                INSERT INTO {quote(Vote._meta.db_table)}
+                    (user_id, content_type_id, object_id, value, created_at, updated_at)
+                SELECT {quote(field.m2m_reverse_name())}, %s, {quote(field.m2m_column_name())},
+                    %s, now(), now()
+                FROM {quote(through._meta.db_table)}
+                ON CONFLICT DO NOTHING
+                """,
+                (content_type.pk, value),
+            )
+
+        votes = Vote.objects.filter(content_type=content_type)
+        model.objects.update(
+            upvote_count=count_subquery(votes.filter(value=1), "object_id"),
+            downvote_count=count_subquery(votes.filter(value=-1), "object_id"),
+        )
+
+
+def restore_votes(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Vote = apps.get_model("votes", "Vote")
+    quote = schema_editor.quote_name
+
+    for app_label, model_name in TARGETS:
+        model = apps.get_model(app_label, model_name)
+        content_type = ContentType.objects.filter(
+            app_label=app_label, model=model_name
+        ).first()
+        if content_type is None:
+            continue
+        for relation, value in RELATIONS:
+            field = model._meta.get_field(relation)
+            through = field.remote_field.through
+            schema_editor.execute(
+                f"""
+                INSERT INTO {quote(through._meta.db_table)}
+                    ({quote(field.m2m_column_name())}, {quote(field.m2m_reverse_name())})
+                SELECT object_id, user_id
+                FROM {quote(Vote._meta.db_table)}
+                WHERE content_type_id = %s AND value = %s
+                ON CONFLICT DO NOTHING
+                """,
+                (content_type.pk, value),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("votes", "0001_initial"),
+        ("ideas", "0002_idea_counters"),
+        ("implementations", "0003_implementation_counters"),
+        ("discussions", "0002_discussion_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_votes, restore_votes),
+    ]
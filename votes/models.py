@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, models, transaction
+
+from accounts.models import Reputation
+from flaam_api.utils.response_cache import bump_generation
+
+UPSERT_VOTE_SQL = """
+WITH changed AS (
+    INSERT INTO {vote_table} AS vote
+        (user_id, content_type_id, object_id, value, created_at, updated_at)
+    VALUES (%(user)s, %(content_type)s, %(object)s, %(value)s, now(), now())
+    ON CONFLICT (user_id, content_type_id, object_id) DO UPDATE
+        SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
+        WHERE vote.value <> EXCLUDED.value
+    RETURNING value, xmax = 0 AS inserted
+)
+UPDATE {target_table} SET
+    upvote_count = GREATEST(upvote_count + delta.up, 0),
+    downvote_count = GREATEST(downvote_count + delta.down, 0)
+FROM (
+    SELECT
+        (value = 1)::int - (NOT inserted AND value = -1)::int AS up,
+        (value = -1)::int - (NOT inserted AND value = 1)::int AS down
+    FROM changed
+) AS delta
+WHERE {target_table}.{target_pk} = %(object)s
+RETURNING {target_table}.owner_id, delta.up, delta.down
+"""
+
+DELETE_VOTE_SQL = """
+WITH changed AS (
+    DELETE FROM {vote_table}
+    WHERE user_id = %(user)s
+        AND content_type_id = %(content_type)s
+        AND object_id = %(object)s
+    RETURNING value
+)
+UPDATE {target_table} SET
+    upvote_count = GREATEST(upvote_count - (changed.value = 1)::int, 0),
+    downvote_count = GREATEST(downvote_count - (changed.value = -1)::int, 0)
+FROM changed
+WHERE {target_table}.{target_pk} = %(object)s
+RETURNING
+    {target_table}.owner_id,
+    -(changed.value = 1)::int,
+    -(changed.value = -1)::int
+"""
+
+
+class VoteManager(models.Manager):
+    def cast(self, target, user, value: int) -> None:
+        """
+        Set the vote of `user` on `target` to `value` (-1, 0 or 1) and adjust
+        the upvote/downvote counters of `target` in a single statement,
+        then the reputation of its owner.
+        """
+        quote = connection.ops.quote_name
+        sql = UPSERT_VOTE_SQL if value else DELETE_VOTE_SQL
+        sql = sql.format(
+            vote_table=quote(self.model._meta.db_table),
+            target_table=quote(target._meta.db_table),
+            target_pk=quote(target._meta.pk.column),
+        )
+        params = {
+            "user": user.pk,
+            "content_type": ContentType.objects.get_for_model(target).pk,
+            "object": target.pk,
+            "value": value,
+        }
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            changed = cursor.fetchone()
+            if changed is not None:
+                owner_id, up, down = changed
+                Reputation.objects.adjust(
+                    owner_id, upvotes_received=up, downvotes_received=down
+                )
+        bump_generation(target)
+
+
+class Vote(models.Model):
+    UPVOTE = 1
+    DOWNVOTE = -1
+    VALUE_CHOICES = ((UPVOTE, "Upvote"), (DOWNVOTE, "Downvote"))
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="votes"
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey("content_type", "object_id")
+    value = models.SmallIntegerField(choices=VALUE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VoteManager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "content_type", "object_id"),
+                name="unique_vote",
+            ),
+            models.CheckConstraint(
+                check=models.Q(value__in=(-1, 1)),
+                name="vote_value",
+            ),
+        )
+        indexes = (models.Index(fields=("content_type", "object_id", "value")),)
+
+    def __str__(self) -> str:
+        return f"V{self.id}"